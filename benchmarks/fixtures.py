@@ -0,0 +1,69 @@
+from classes.season import MLSSeason, NHLSeason
+from datetime import datetime, timedelta
+import random
+
+# Synthetic full seasons for benchmarking, built through import_json/add_game so nothing touches the network. Each team
+# plays every round (an even number of teams), the first `played` share of rounds is final, and a few games of the next
+# round are live.
+
+nhl_divisions = {"Western": ["Central", "Pacific"], "Eastern": ["Metropolitan", "Atlantic"]}
+
+def nhl_json(start_year: int = 2023, rounds: int = 82, played: float = 0.6, live: int = 4, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    teams = {}
+    for conference, divisions in nhl_divisions.items():
+        for division in divisions:
+            for _ in range(8):
+                id = len(teams) + 1
+                teams[id] = {"name": f"{division} {id}", "short_name": f"{division[:3]}{id}", "team_name": f"Team {id}",
+                             "conference": conference, "division": division}
+
+    games = {}
+    ids = list(teams)
+    start = datetime(start_year, 10, 10, 19)
+    for round in range(rounds):
+        rng.shuffle(ids)
+        for home_id, away_id in zip(ids[::2], ids[1::2]):
+            game = {"home_id": home_id, "away_id": away_id, "start": (start + timedelta(days=2*round)).isoformat(),
+                    "status": "Scheduled", "home_score": 0, "away_score": 0, "result_type": None}
+            if round < played*rounds:
+                home_score, away_score = rng.randint(0, 6), rng.randint(0, 6)
+                result_type = "R"
+                if home_score == away_score:
+                    result_type = rng.choice(["OT", "SO"])
+                    if rng.random() < 0.5:
+                        home_score += 1
+                    else:
+                        away_score += 1
+                game.update(status="Final", home_score=home_score, away_score=away_score, result_type=result_type)
+            elif round == int(played*rounds) + 1 and live > 0:
+                live -= 1
+                game.update(status="Live", home_score=rng.randint(0, 3), away_score=rng.randint(0, 3))
+            games[2023020001 + len(games)] = game
+    return {"teams": teams, "games": games}
+
+def nhl_season(**kwargs) -> NHLSeason:
+    return NHLSeason(2023, import_json=nhl_json(**kwargs))
+
+def mls_season(rounds: int = 34, played: float = 0.6, live: int = 3, seed: int = 0) -> MLSSeason:
+    rng = random.Random(seed)
+    season = MLSSeason(2023)
+    for id in range(1, 31):
+        season.add_team(f"Club {id}", f"C{id}", "Western" if id % 2 else "Eastern", id)
+
+    ids = list(season.teams)
+    start = datetime(2023, 2, 25, 19)
+    for round in range(rounds):
+        rng.shuffle(ids)
+        for home_id, away_id in zip(ids[::2], ids[1::2]):
+            game_id = len(season.games) + 1
+            when = start + timedelta(days=7*round)
+            if round < played*rounds:
+                season.add_game(game_id, home_id, away_id, when, "FullTime", rng.randint(0, 4), rng.randint(0, 4),
+                                rng.randint(0, 12), rng.randint(0, 12))
+            elif round == int(played*rounds) + 1 and live > 0:
+                live -= 1
+                season.add_game(game_id, home_id, away_id, when, "Live", rng.randint(0, 2), rng.randint(0, 2))
+            else:
+                season.add_game(game_id, home_id, away_id, when, "Scheduled")
+    return season
@@ -0,0 +1,155 @@
+from benchmarks.fixtures import mls_season, nhl_json, nhl_season
+from classes.season import NHLSeason, Season
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+# Benchmarks for the standings, simulation and ingest hot paths, on synthetic full seasons (benchmarks/fixtures.py).
+# Run from the repo root:
+#   python -m benchmarks.run                                    # run everything, save to benchmarks/results/
+#   python -m benchmarks.run --compare benchmarks/results/x.json   # also compare against an earlier run
+# Each benchmark reports the best and median wall time over --repeat runs, and the peak traced allocation of one extra
+# run under tracemalloc. A comparison flags any benchmark whose best time or peak memory grew by more than --threshold,
+# and exits with status 1 if one did, so it can gate a deploy.
+
+results_directory = os.path.join(os.path.dirname(__file__), "results")
+
+# name -> (setup, run): setup builds fresh state outside the timed region and returns the argument run gets
+benchmarks: dict[str, tuple[Callable[[], Any], Callable[[Any], Any]]] = {}
+
+def benchmark(name: str, setup: Callable[[], Any]) -> Callable[[Callable[[Any], Any]], Callable[[Any], Any]]:
+    def register(run: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        benchmarks[name] = (setup, run)
+        return run
+    return register
+
+leagues: dict[str, Callable[[], Season]] = {"nhl": nhl_season, "mls": mls_season}
+
+# standings from cold caches, as after a full recompute
+def cold(season: Season) -> Season:
+    season._stats_changed(tuple(season.teams), official=True)
+    season._live_stale = True
+    return season
+
+def remaining_results(season: Season) -> list[Any]:
+    rng = random.Random(0)
+    results = []
+    for game in season.games.values():
+        if game.status != season.final_status:
+            fields = game.fields()
+            fields.update(status=season.final_status, home_score=rng.randint(0, 4), away_score=rng.randint(0, 4))
+            if "result_type" in fields:
+                fields["home_score"] += fields["home_score"] == fields["away_score"]
+                fields["result_type"] = "R"
+            results.append(season.game_cls(fields.pop("home_id"), fields.pop("away_id"), fields.pop("start"), **fields))
+    return results
+
+for league, build in leagues.items():
+    season = build()
+    state = lambda season=season: cold(season)
+
+    benchmark(f"{league}.standings", state)(lambda season: season.standings())
+    benchmark(f"{league}.standings_live", state)(lambda season: season.standings(live=True))
+    benchmark(f"{league}.update_official_stats", lambda season=season: season)(lambda season: season.update_official_stats())
+    benchmark(f"{league}.simulate_games", lambda season=season: (season, remaining_results(season)))(
+        lambda args: args[0].simulate_games(args[1]))
+    benchmark(f"{league}.json", lambda season=season: season)(lambda season: season.json())
+    benchmark(f"{league}.simulations_per_1k", lambda season=season: season)(
+        lambda season: season.simulate_playoff_odds(1_000, seed=0))
+
+benchmark("nhl.import_json", lambda: json.loads(nhl_season().json()))(lambda data: NHLSeason(2023, import_json=data))
+benchmark("nhl.build_fixture", lambda: None)(lambda _: NHLSeason(2023, import_json=nhl_json()))
+
+
+def measure(setup: Callable[[], Any], run: Callable[[Any], Any], repeat: int) -> dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        argument = setup()
+        start = time.perf_counter()
+        run(argument)
+        times.append(time.perf_counter() - start)
+
+    argument = setup()
+    tracemalloc.start()
+    try:
+        run(argument)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"best_ms": min(times)*1e3, "median_ms": statistics.median(times)*1e3, "peak_kib": peak/1024}
+
+def environment() -> dict[str, str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {"commit": commit, "python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+            "processor": platform.processor(), "timestamp": datetime.now(timezone.utc).isoformat()}
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float) -> list[str]:
+    regressions = []
+    print(f"\n{'benchmark':32} {'best ms':>12} {'was':>10} {'ratio':>7} {'peak KiB':>12} {'was':>10} {'ratio':>7}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:32} {result['best_ms']:12.3f} {'new':>10}")
+            continue
+        time_ratio = result["best_ms"]/max(before["best_ms"], 1e-9)
+        memory_ratio = result["peak_kib"]/max(before["peak_kib"], 1e-9)
+        # small allocations swing by whole blocks, so memory only counts once it grew by more than 64 KiB too
+        grew = memory_ratio > threshold and result["peak_kib"] - before["peak_kib"] > 64
+        flag = " <-" if time_ratio > threshold or grew else ""
+        print(f"{name:32} {result['best_ms']:12.3f} {before['best_ms']:10.3f} {time_ratio:7.2f} "
+              f"{result['peak_kib']:12.1f} {before['peak_kib']:10.1f} {memory_ratio:7.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark standings, simulation and ingest on synthetic seasons")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--save", default=None, help="results file (default: benchmarks/results/<timestamp>-<commit>.json)")
+    parser.add_argument("--no-save", action="store_true", help="don't write a results file")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown/memory ratio counted as a regression")
+    args = parser.parse_args(argv)
+
+    results = {}
+    print(f"{'benchmark':32} {'best ms':>12} {'median ms':>12} {'peak KiB':>12}")
+    for name, (setup, run) in benchmarks.items():
+        if args.filter in name:
+            results[name] = measure(setup, run, args.repeat)
+            print(f"{name:32} {results[name]['best_ms']:12.3f} {results[name]['median_ms']:12.3f} {results[name]['peak_kib']:12.1f}")
+
+    env = environment()
+    if not args.no_save:
+        path = args.save or os.path.join(results_directory, f"{env['timestamp'][:19].replace(':', '')}-{env['commit']}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"environment": env, "repeat": args.repeat, "results": results}, f, indent=2)
+        print(f"\nsaved {path}")
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["environment"].get("machine") != env["machine"]:
+            print(f"note: baseline is from a different machine ({baseline['environment'].get('machine')})")
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold}x: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
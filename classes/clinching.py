@@ -0,0 +1,242 @@
+from itertools import combinations
+from typing import Callable, Iterator, Optional
+from utils.max_flow import FlowNetwork
+import time
+
+# Clinch/elimination checks on points only, over the remaining schedule. Ties in points count against the team being
+# checked (tiebreakers are not projected), so "clinched" means strictly ahead in every outcome and "eliminated" means
+# strictly behind in every outcome. A cutoff is given as which sets of teams finishing level with or ahead of the team
+# keep it out (eg any k of them for top k, or per-stage group counts for division spots plus wild cards):
+# - clinching: can no set of others that keeps the team out all reach its current points while it loses every game?
+# - elimination: with the team winning every game, can no set of others be held to its points so that the teams left
+#   over (and those already past it) don't keep it out?
+# Both are exact. The sets are searched depth first, the likeliest teams first, dropping every superset of a set that
+# can't make it (a subset of a feasible set is always feasible). Whether one set can make it is a max-flow check over the
+# games among its teams; when that flow isn't exact for the league's points (MLS ties) it branches over those games'
+# results, pruning with the flow bounds. Deciding this is NP-hard for some points systems, so a check gives up and
+# answers None (unknown) rather than True/False after call_seconds, or once the solver has spent max_seconds over all its
+# checks (one solver serves one round of checks, eg Season.clinch_status).
+class ClinchSolver:
+    def __init__(self, points: list[int], remaining: list[list[int]], win_points: int, tie_points: int, max_game_points: int,
+                 max_seconds: float = 3.0, call_seconds: float = 0.5) -> None:
+        self.points = points
+        self.remaining = remaining                  # remaining[a][b]: games left between teams a and b
+        self.games_left = [sum(row) for row in remaining]
+        self.win_points = win_points
+        self.tie_points = tie_points                # points to each side of a tie, 0 if games can't end tied
+        self.max_game_points = max_game_points      # most points one game can hand out in total (eg NHL OT: 2 + 1)
+        self.max_seconds = max_seconds              # time spent on checks over the solver's life
+        self.call_seconds = call_seconds            # time per clinched/eliminated call
+        self.checks = 0                             # flow checks made
+        self.spent = 0.0                            # seconds spent on checks
+        self._last = 0.0
+        self._deadline = 0.0
+
+        # every result as (points to one side, points to the other)
+        extra_time = max_game_points - win_points
+        outcomes = {(win_points, 0), (0, win_points)}
+        if tie_points:
+            outcomes.add((tie_points, tie_points))
+        if 0 < extra_time < win_points:
+            outcomes.update({(win_points, extra_time), (extra_time, win_points)})
+        dominates = lambda x, y: x != y and x[0] >= y[0] and x[1] >= y[1]
+        self.most = [o for o in sorted(outcomes) if not any(dominates(p, o) for p in outcomes)]     # results worth chasing
+        self.least = [o for o in sorted(outcomes) if not any(dominates(o, p) for p in outcomes)]    # results worth holding to
+        self.least_total = min(a + b for a, b in outcomes)
+        self.least_gain = min(x for o in outcomes for x in o if x)
+        # the reach flow is exact if every split it allows in a game is covered by one real result (true for NHL, not for
+        # MLS, where a 2-1 split isn't); the wins-only hold flow is exact if every result gives one side a full win
+        self.reach_exact = all(any(x >= a and y >= b for x, y in self.most) for a in range(win_points + 1)
+                               for b in range(min(win_points, max_game_points - a) + 1))
+        self.hold_exact = all(max(o) >= win_points for o in outcomes)
+
+    def max_points(self, team: int) -> int:
+        return self.points[team] + self.win_points*self.games_left[team]
+
+    # True: clinched, False: not clinched, None: unknown (out of time). `beaten(above)` says whether the team misses the
+    # cutoff when exactly the teams `above` finish level with or ahead of it (eg lambda above: len(above) >= spots for top
+    # spots); it must stay True as teams are added.
+    def clinched(self, team: int, others: list[int], beaten: Callable[[list[int]], bool]) -> Optional[bool]:
+        self._start()
+        target = self.points[team]
+        threats = sorted((j for j in others if self.max_points(j) >= target), key=lambda j: self.max_points(j) - target, reverse=True)
+        if not beaten(threats):
+            return True
+        found = self._find_set(threats, beaten, lambda chasers: self._can_all_reach(chasers, target))
+        return None if found is None else not found
+
+    # True: eliminated, False: not eliminated, None: unknown (out of time); `beaten` as for clinched, with the teams
+    # finishing strictly ahead
+    def eliminated(self, team: int, others: list[int], beaten: Callable[[list[int]], bool]) -> Optional[bool]:
+        self._start()
+        ceiling = self.max_points(team)
+        ahead = [j for j in others if self.points[j] > ceiling]
+        if beaten(ahead):
+            return True
+
+        candidates = sorted((j for j in others if self.points[j] <= ceiling), key=lambda j: ceiling - self.points[j], reverse=True)
+        through = lambda held: not beaten(ahead + [j for j in candidates if j not in set(held)])
+        found = self._find_set(candidates, through, lambda held: self._can_hold_below(held, ceiling))
+        return None if found is None else not found
+
+    # is there a feasible set of `candidates` that reaches `goal`? goal must carry over to supersets and feasibility to
+    # subsets; None if unknown. Each set is checked at most once per search.
+    def _find_set(self, candidates: list[int], goal: Callable[[list[int]], bool],
+                  feasible: Callable[[list[int]], Optional[bool]]) -> Optional[bool]:
+        known: dict[frozenset[int], Optional[bool]] = {}
+
+        def check(teams: list[int]) -> Optional[bool]:
+            key = frozenset(teams)
+            if key not in known:
+                known[key] = feasible(teams)
+            return known[key]
+
+        def extend(chosen: list[int], start: int) -> Optional[bool]:
+            if goal(chosen):
+                return True
+            # the likeliest completion, the fewest next candidates that reach the goal, settles most searches in one check
+            rest = candidates[start:]
+            fewest = next((k for k in range(1, len(rest) + 1) if goal(chosen + rest[:k])), None)
+            if fewest is None:
+                return False
+            if check(chosen + rest[:fewest]):
+                return True
+            for i in range(start, len(candidates)):
+                if not goal(chosen + candidates[i:]):
+                    break
+                trial = chosen + [candidates[i]]
+                result = check(trial)
+                if result:
+                    result = extend(trial, i + 1)
+                if result is not False:
+                    return result
+            return False
+        return extend([], 0)
+
+    def _pairs(self, teams: list[int]) -> list[tuple[int, int, int]]:
+        return [(a, b, self.remaining[a][b]) for a, b in combinations(teams, 2) if self.remaining[a][b]]
+
+    def _start(self) -> None:
+        self._last = time.monotonic()
+        self._deadline = self._last + min(self.call_seconds, self.max_seconds - self.spent)
+
+    # False once the call is out of time; the time since the last check is charged to the solver
+    def _spend(self) -> bool:
+        now = time.monotonic()
+        self.spent += now - self._last
+        self._last = now
+        if now >= self._deadline:
+            return False
+        self.checks += 1
+        return True
+
+    # can every one of `chasers` finish with at least `target` points? games against anyone else are won outright
+    def _can_all_reach(self, chasers: list[int], target: int) -> Optional[bool]:
+        chaser_set = set(chasers)
+        needs = {}
+        for j in chasers:
+            outside = sum(n for o, n in enumerate(self.remaining[j]) if o not in chaser_set)
+            needs[j] = target - self.points[j] - self.win_points*outside
+        return self._reach(self._pairs(chasers), needs)
+
+    def _reach(self, pairs: list[tuple[int, int, int]], needs: dict[int, int]) -> Optional[bool]:
+        needs = {j: need for j, need in needs.items() if need > 0}
+        if not needs:
+            return True
+        if not self._spend():
+            return None
+        pairs = [(a, b, n) for a, b, n in pairs if a in needs or b in needs]
+        total = sum(needs.values())
+        # relaxation: each game hands out up to max_game_points, at most win_points to one side
+        if total > self.max_game_points*sum(n for _, _, n in pairs) or self._flow(pairs, needs, self.max_game_points, self.win_points) < total:
+            return False
+        if self.reach_exact:
+            return True
+        # a witness: wins only
+        wins = {j: -(-need // self.win_points) for j, need in needs.items()}
+        if self._flow(pairs, wins, 1, 1) == sum(wins.values()):
+            return True
+        return self._branch(pairs, needs, self.most, self._reach)
+
+    # can every team in `held` finish with at most `ceiling` points? games against anyone else are lost outright
+    def _can_hold_below(self, held: list[int], ceiling: int) -> Optional[bool]:
+        return self._hold(self._pairs(held), {j: ceiling - self.points[j] for j in held})
+
+    def _hold(self, pairs: list[tuple[int, int, int]], room: dict[int, int]) -> Optional[bool]:
+        # settle the teams whose games are forced: one with room to win them all holds anyway (its opponents get nothing),
+        # one with no room for even the smallest result loses them all
+        room = dict(room)
+        while True:
+            if any(r < 0 for r in room.values()):
+                return False
+            played = dict.fromkeys(room, 0)
+            for a, b, n in pairs:
+                played[a] += n
+                played[b] += n
+            settled = next((j for j, r in room.items() if r >= self.win_points*played[j] or r < self.least_gain), None)
+            if settled is None:
+                break
+            for a, b, n in pairs:
+                if settled in (a, b) and room[settled] < self.least_gain:
+                    room[b if a == settled else a] -= self.win_points*n
+            pairs = [(a, b, n) for a, b, n in pairs if settled not in (a, b)]
+            del room[settled]
+        if not pairs:
+            return True
+        if not self._spend():
+            return None
+        games = sum(n for _, _, n in pairs)
+        # a witness: wins only
+        if self._flow(pairs, {j: r // self.win_points for j, r in room.items()}, 1, 1) == games:
+            return True
+        if self.hold_exact:
+            return False
+        # relaxation: each game hands out at least least_total points, split any way
+        least = self.least_total
+        if least*games > sum(room.values()) or self._flow(pairs, room, least, least) < least*games:
+            return False
+        return self._branch(pairs, room, self.least, self._hold)
+
+    # settle the first pair's games every way (counts of each result), taking the points off the teams' needs or room, and
+    # recurse on the rest
+    def _branch(self, pairs: list[tuple[int, int, int]], limits: dict[int, int], outcomes: list[tuple[int, int]],
+                check: Callable[[list[tuple[int, int, int]], dict[int, int]], Optional[bool]]) -> Optional[bool]:
+        (a, b, n), rest = pairs[0], pairs[1:]
+        for counts in _compositions(n, len(outcomes)):
+            after = dict(limits)
+            for (x, y), count in zip(outcomes, counts):
+                if a in after:
+                    after[a] -= x*count
+                if b in after:
+                    after[b] -= y*count
+            result = check(rest, after)
+            if result is not False:
+                return result
+        return False
+
+    # max flow from games to teams: each game supplies `per_game` units, at most `per_side` to either team, and team j
+    # takes at most capacity[j]
+    def _flow(self, pairs: list[tuple[int, int, int]], capacity: dict[int, int], per_game: int, per_side: int) -> int:
+        teams = list(capacity)
+        node = {j: 1 + len(pairs) + i for i, j in enumerate(teams)}
+        sink = 1 + len(pairs) + len(teams)
+        network = FlowNetwork(sink + 1)
+        for p, (a, b, n) in enumerate(pairs, start=1):
+            network.add_edge(0, p, n*per_game)
+            if a in node:
+                network.add_edge(p, node[a], n*per_side)
+            if b in node:
+                network.add_edge(p, node[b], n*per_side)
+        for j in teams:
+            network.add_edge(node[j], sink, max(0, capacity[j]))
+        return network.max_flow(0, sink)
+
+
+# every way of splitting n games between k results
+def _compositions(n: int, k: int) -> Iterator[tuple[int, ...]]:
+    if k == 1:
+        yield (n,)
+        return
+    for first in range(n, -1, -1):
+        for rest in _compositions(n - first, k - 1):
+            yield (first,) + rest
@@ -1,5 +1,8 @@
 from datetime import datetime
-from typing import Literal
+from typing import TYPE_CHECKING, Any, Literal, Optional
+
+if TYPE_CHECKING:
+    from classes.season import Season
 
 class Game:
     def __init__(self, home_id: int, away_id: int, start_datetime: datetime, status: str,
@@ -10,22 +13,53 @@ class Game:
         self.start = start_datetime
         self.home_score = home_score
         self.away_score = away_score
+        self._season: Optional["Season"] = None     # set by Season.add_game, so changes reach its standings
+        self._id: Optional[int] = None
+
+    def fields(self) -> dict[str, Any]:
+        return {field: value for field, value in self.__dict__.items() if not field.startswith('_')}
+
+    # writes only the fields that actually changed; the owning season takes this game's old state out of its stats
+    # before the change and puts the new state in after, so an update costs O(1) instead of a full recompute
+    def update_fields(self, **fields: Any) -> dict[str, Any]:
+        changed = {field: value for field, value in fields.items() if getattr(self, field) != value}
+        if changed:
+            if self._season is not None:
+                self._season._game_changing(self)
+            for field, value in changed.items():
+                setattr(self, field, value)
+            if self._season is not None:
+                self._season._game_changed(self, changed)
+        return changed
+
+    def update(self, status: str, home_score: int, away_score: int) -> dict[str, Any]:
+        return self.update_fields(status=status, home_score=home_score, away_score=away_score)
 
-    # TODO override in subclasses
-    def update(self, status: str, home_score: int, away_score: int) -> None:
-        self.status = status
-        self.home_score = home_score
-        self.away_score = away_score
-    
 class MLSGame(Game):
     def __init__(self, home_id: int, away_id: int, start_datetime: datetime, status: str, home_score: int = 0,
                  away_score: int = 0, home_disciplinary_points: int = 0, away_disciplinary_points: int = 0) -> None:
         super().__init__(home_id, away_id, start_datetime, status, home_score, away_score)
         self.home_disciplinary_points = home_disciplinary_points
         self.away_disciplinary_points = away_disciplinary_points
-            
+
+    def update(self, status: str, home_score: int, away_score: int, home_disciplinary_points: Optional[int] = None,
+               away_disciplinary_points: Optional[int] = None) -> dict[str, Any]:
+        fields = {"status": status, "home_score": home_score, "away_score": away_score}
+        if home_disciplinary_points is not None:
+            fields["home_disciplinary_points"] = home_disciplinary_points
+        if away_disciplinary_points is not None:
+            fields["away_disciplinary_points"] = away_disciplinary_points
+        return self.update_fields(**fields)
+
 class NHLGame(Game):
     def __init__(self, home_id: int, away_id: int, start_datetime: datetime, status: str, home_score: int = 0,
                  away_score: int = 0, result_type: Literal["R", "OT", "SO"] = None) -> None:
         super().__init__(home_id, away_id, start_datetime, status, home_score, away_score)
-        self.result_type = result_type
\ No newline at end of file
+        self.result_type = result_type
+
+    def update(self, status: str, home_score: int, away_score: int,
+               result_type: Optional[Literal["R", "OT", "SO"]] = None) -> dict[str, Any]:
+        fields = {"status": status, "home_score": home_score, "away_score": away_score}
+        if result_type is not None:
+            fields["result_type"] = result_type
+        return self.update_fields(**fields)
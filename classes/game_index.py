@@ -0,0 +1,71 @@
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timezone
+from typing import Optional
+
+# Lookups into a season's games without scanning Season.games: game ids by start time, by team (each team's games in
+# start order) and by status. Season keeps it current through the same per-game hooks as the standings (an entry is taken
+# out with the game's old fields and put back with the new ones), and utils.snapshot fills it straight from the game
+# records, so lookups never build Game objects. Start times without a timezone are taken as UTC; start_key is the one
+# place that conversion is made (the live poller, snapshots and the event log use it too).
+
+def start_key(moment: datetime) -> float:
+    return (moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)).timestamp()
+
+class GameIndex:
+    def __init__(self) -> None:
+        self.starts: list[tuple[float, int]] = []           # (start, game id), sorted
+        self.teams: dict[int, list[tuple[float, int]]] = {}
+        self.statuses: dict[str, set[int]] = {}
+
+    def add(self, game_id: int, home_id: int, away_id: int, start: datetime, status: str) -> None:
+        entry = (start_key(start), game_id)
+        insort(self.starts, entry)
+        for team_id in (home_id, away_id):
+            insort(self.teams.setdefault(team_id, []), entry)
+        self.statuses.setdefault(status, set()).add(game_id)
+
+    # bulk add from (game id, home id, away id, start_key(start), status) rows, sorting once at the end
+    def extend(self, games: Iterable[tuple[int, int, int, float, str]]) -> None:
+        for game_id, home_id, away_id, key, status in games:
+            self.starts.append((key, game_id))
+            for team_id in (home_id, away_id):
+                self.teams.setdefault(team_id, []).append((key, game_id))
+            self.statuses.setdefault(status, set()).add(game_id)
+        self.starts.sort()
+        for entries in self.teams.values():
+            entries.sort()
+
+    def remove(self, game_id: int, home_id: int, away_id: int, start: datetime, status: str) -> None:
+        entry = (start_key(start), game_id)
+        for entries in (self.starts, self.teams[home_id], self.teams[away_id]):
+            del entries[bisect_left(entries, entry)]
+        self.statuses[status].discard(game_id)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    # ids of the games with this status; a live set, so copy it before changing games while iterating
+    def with_status(self, status: str) -> set[int]:
+        return self.statuses.get(status, set())
+
+    # ids of the games starting from `start` to `end` (both inclusive), in start order
+    def between(self, start: datetime, end: datetime) -> list[int]:
+        lo = bisect_left(self.starts, (start_key(start), float("-inf")))
+        hi = bisect_right(self.starts, (start_key(end), float("inf")))
+        return [game_id for _, game_id in self.starts[lo:hi]]
+
+    # ids of the games starting strictly after `moment`, in start order
+    def after(self, moment: datetime) -> Iterator[int]:
+        for i in range(bisect_right(self.starts, (start_key(moment), float("inf"))), len(self.starts)):
+            yield self.starts[i][1]
+
+    # ids of every game in start order, optionally leaving out one status (eg the final games)
+    def ordered(self, excluding: Optional[str] = None) -> list[int]:
+        skip = self.statuses.get(excluding, set())
+        return [game_id for _, game_id in self.starts if game_id not in skip]
+
+    # ids of a team's games in start order, optionally leaving out one status
+    def team_games(self, team_id: int, excluding: Optional[str] = None) -> list[int]:
+        skip = self.statuses.get(excluding, set())
+        return [game_id for _, game_id in self.teams.get(team_id, []) if game_id not in skip]
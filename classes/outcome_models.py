@@ -0,0 +1,131 @@
+from typing import TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    from classes.game import Game
+    from classes.season import Season
+
+# Outcome models (readme, "Calculating playoff odds") turn the remaining schedule into one (n_games, n_outcomes) table of
+# outcome probabilities, in Season.simulation_outcomes order, for the simulator. Models that learn from results keep
+# running sums which the season updates for every game that goes final (or stops being final, sign=-1), so fitted
+# parameters follow the season without refitting from scratch; fit() is only for attaching a model to a season.
+# Teams are identified by their stats store index, as in Season.head_to_head.
+
+class OutcomeModel:
+    def fit(self, season: "Season") -> None:
+        self.reset(season)
+        for game in season.games.values():
+            if game.status == season.final_status:
+                self.observe(season, game, 1)
+
+    def reset(self, season: "Season") -> None:
+        pass
+
+    def observe(self, season: "Season", game: "Game", sign: int) -> None:
+        pass
+
+    # home/away: (n_games,) stats store index of each remaining game's teams
+    def probabilities(self, season: "Season", home: np.ndarray, away: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+# Method 1: every outcome equally likely
+class UniformOutcomeModel(OutcomeModel):
+    def fit(self, season: "Season") -> None:
+        pass
+
+    def probabilities(self, season: "Season", home: np.ndarray, away: np.ndarray) -> np.ndarray:
+        n_outcomes = len(season.simulation_outcomes)
+        return np.full((len(home), n_outcomes), 1/n_outcomes)
+
+
+# Method 2: outcomes weighted by how often each one (eg a home shootout win) has happened so far this season, with
+# `prior` pseudo-results per outcome so early-season odds aren't extreme
+class ResultTypeOutcomeModel(OutcomeModel):
+    def __init__(self, prior: float = 1.0) -> None:
+        self.prior = prior
+        self.counts = np.zeros(0)
+
+    def reset(self, season: "Season") -> None:
+        self.counts = np.zeros(len(season.simulation_outcomes))
+
+    def observe(self, season: "Season", game: "Game", sign: int) -> None:
+        self.counts[season.game_outcome(game)] += sign
+
+    def frequencies(self) -> np.ndarray:
+        weights = self.counts + self.prior
+        return weights/weights.sum()
+
+    def probabilities(self, season: "Season", home: np.ndarray, away: np.ndarray) -> np.ndarray:
+        return np.tile(self.frequencies(), (len(home), 1))
+
+
+# Method 3: team strength from goals. Each side's goals are Poisson, with the league's home/away scoring rate scaled by
+# the scoring team's attack and the other team's defence (goals for/against relative to what an average team would have
+# had in the same home/away games, shrunk towards average by `prior_games`). The season's outcome_table turns the
+# regulation win/draw/loss odds into its own outcomes, using the Method 2 frequencies for eg OT vs shootout.
+class PoissonOutcomeModel(OutcomeModel):
+    def __init__(self, prior_games: float = 5.0, max_goals: int = 10, prior: float = 1.0) -> None:
+        self.prior_games = prior_games
+        self.max_goals = max_goals
+        self.result_types = ResultTypeOutcomeModel(prior)
+        # per team: goals for/against and games played, at home (row 0) and away (row 1)
+        self.goals_for = np.zeros((2, 0))
+        self.goals_against = np.zeros((2, 0))
+        self.games = np.zeros((2, 0))
+
+    def reset(self, season: "Season") -> None:
+        n_teams = len(season.teams)
+        self.goals_for = np.zeros((2, n_teams))
+        self.goals_against = np.zeros((2, n_teams))
+        self.games = np.zeros((2, n_teams))
+        self.result_types.reset(season)
+
+    def observe(self, season: "Season", game: "Game", sign: int) -> None:
+        home, away = season.teams[game.home_id].stats.index, season.teams[game.away_id].stats.index
+        self._grow(max(home, away) + 1)
+        for venue, team, scored, conceded in ((0, home, game.home_score, game.away_score), (1, away, game.away_score, game.home_score)):
+            self.goals_for[venue, team] += sign*scored
+            self.goals_against[venue, team] += sign*conceded
+            self.games[venue, team] += sign
+        self.result_types.observe(season, game, sign)
+
+    # teams added after the model was fitted start with no games
+    def _grow(self, n_teams: int) -> None:
+        if n_teams > self.games.shape[1]:
+            grow = ((0, 0), (0, n_teams - self.games.shape[1]))
+            self.goals_for, self.goals_against, self.games = (np.pad(a, grow) for a in (self.goals_for, self.goals_against, self.games))
+
+    # (home rate, away rate) per game for the league, and attack/defence multipliers per team
+    def strengths(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        played = self.games.sum(axis=1)
+        rates = np.where(played > 0, self.goals_for.sum(axis=1)/np.maximum(played, 1), 1.0)
+        conceded_rates = rates[::-1]                # a home team concedes at the away scoring rate
+        expected_for = rates @ self.games
+        expected_against = conceded_rates @ self.games
+        mean_rate = rates.mean()
+        attack = (self.goals_for.sum(axis=0) + self.prior_games*mean_rate)/(expected_for + self.prior_games*mean_rate)
+        defence = (self.goals_against.sum(axis=0) + self.prior_games*mean_rate)/(expected_against + self.prior_games*mean_rate)
+        return rates, attack, defence
+
+    def probabilities(self, season: "Season", home: np.ndarray, away: np.ndarray) -> np.ndarray:
+        self._grow(len(season.teams))
+        rates, attack, defence = self.strengths()
+        home_rate = rates[0]*attack[home]*defence[away]
+        away_rate = rates[1]*attack[away]*defence[home]
+
+        # Poisson pmfs over 0..max_goals for every game at once, the tail folded into max_goals
+        goals = np.arange(self.max_goals + 1)
+        log_factorial = np.concatenate([[0.0], np.cumsum(np.log(goals[1:]))])
+        pmf = lambda rate: np.exp(goals*np.log(rate[:, None]) - rate[:, None] - log_factorial)
+        home_pmf, away_pmf = pmf(home_rate), pmf(away_rate)
+        home_pmf[:, -1] += 1 - home_pmf.sum(axis=1)
+        away_pmf[:, -1] += 1 - away_pmf.sum(axis=1)
+
+        away_below = np.cumsum(away_pmf, axis=1) - away_pmf     # P(away goals < k)
+        home_win = (home_pmf*away_below).sum(axis=1)
+        draw = (home_pmf*away_pmf).sum(axis=1)
+        away_win = np.clip(1 - home_win - draw, 0, 1)
+        # share of the decisive extra period (if any) going to the home side, by relative scoring rate
+        home_edge = home_rate/(home_rate + away_rate)
+        return season.outcome_table(home_win, draw, away_win, home_edge, self.result_types.frequencies())
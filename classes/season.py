@@ -1,11 +1,18 @@
 from classes.team import Team, MLSTeam, NHLTeam
 from classes.game import Game, MLSGame, NHLGame
+from classes.stats import StatsStore
+from classes.clinching import ClinchSolver
+from classes.game_index import GameIndex
+from classes.outcome_models import OutcomeModel, UniformOutcomeModel
+from heapq import nlargest
+from classes import simulation
 from utils.serializer import serializer
-from typing import Literal, Optional
+from typing import Any, Callable, Literal, Optional
 from typing_extensions import override
-from copy import deepcopy
 from datetime import datetime
+import numpy as np
 import json
+import random
 import requests
 
 mls_standings_header: list[str] = ["Club", "Points", "Points Per Game", "Games Played", "Wins", "Losses", "Ties", "Goals For", 
@@ -22,7 +29,16 @@ def mls_standings_rules(t: MLSTeam) -> tuple[int, ...]:
             t.get_away_goals_for(),                 # 7.  Total number of away goals scored
             t.get_home_goal_differential(),         # 8.  Home goal differential
             t.get_home_goals_for()                  # 9.  Total number of home goals scored
-    )                                               # 10. Coin flip
+    )                                               # 10. Coin flip (seeded, see Season._break_ties)
+mls_playoff_rules: list[tuple[str, int]] = [("conference", 9)]         # 2023 MLS: top 9 in each conference
+mls_clinch_rules: list[tuple[str, str, Optional[str], int]] = [
+    ("supporters_shield", "s", None, 1)                                 # best record in the league
+]
+mls_simulation_outcomes: list[tuple[str, dict[str, int], dict[str, int]]] = [
+    ("home W", {'wins': 1},   {'losses': 1}),
+    ("T",      {'ties': 1},   {'ties': 1}),
+    ("away W", {'losses': 1}, {'wins': 1})
+]
 
 nhl_standings_header: list[str] = ["Team", "Games Played", "Wins", "Regulation Losses", "Overtime/Shootout Losses", 
                                    "Points", "Points %", "Goals For", "Regulation Wins", "Regulation/Overtime Wins", 
@@ -35,96 +51,635 @@ def nhl_standings_rules(t: NHLTeam) -> tuple[int, ...]:
         t.get_regulation_win_count(),                   # 3. Regulation wins
         t.get_regulation_overtime_win_count(),          # 4. Regulation wins + OT wins
         t.get_win_count(),                              # 5. Overall wins
-        # t.                                              # 6. Points earned in games among tied teams
+                                                        # 6. Points earned in games among tied teams (see Season._break_ties and
+                                                        #    simulation.head_to_head_among). Simplified: the NHL drops the first
+                                                        #    game in the city with an extra home game when two teams are tied, and
+                                                        #    compares percentages of available points without "odd" games when
+                                                        #    more are; raw points over every game among them are used here
         t.get_overall_goal_differential(),              # 7. Goal differential (including goals counted for shootout wins/losses)
         t.get_overall_goals_for()                       # 8. Total number of goals scored (including goals awarded for shootout wins)
     )
+nhl_playoff_rules: list[tuple[str, int]] = [("division", 3), ("conference", 2)]    # top 3 in each division, then 2 wild cards per conference
+nhl_clinch_rules: list[tuple[str, str, Optional[str], int]] = [                     # (name, marker, group, spots), most significant first
+    ("presidents_trophy", "p", None, 1),
+    ("conference", "z", "conference", 1),
+    ("division", "y", "division", 1)
+]
+nhl_simulation_outcomes: list[tuple[str, dict[str, int], dict[str, int]]] = [
+    ("home R",  {'regulation_wins': 1},   {'regulation_losses': 1}),
+    ("home OT", {'overtime_wins': 1},     {'overtime_losses': 1}),
+    ("home SO", {'shootout_wins': 1},     {'shootout_losses': 1}),
+    ("away R",  {'regulation_losses': 1}, {'regulation_wins': 1}),
+    ("away OT", {'overtime_losses': 1},   {'overtime_wins': 1}),
+    ("away SO", {'shootout_losses': 1},   {'shootout_wins': 1})
+]
 
 class Season:
-    def __init__(self, standings_header: list[str], standings_header_compact: list[str], standings_rules: tuple[int, ...]) -> None:
+    team_cls: type = Team
+    game_cls: type = Game
+    final_status: str = "Final"
+    live_status: str = "Live"
+    win_points: int = 2
+    tie_points: int = 0
+    max_game_points: int = 2
+    head_to_head_rule: Optional[int] = None     # position in the standings rules tuple where head-to-head points apply
+    coin_flip: bool = False                     # whether teams still tied after every rule are split by a coin flip
+
+    def __init__(self, standings_header: list[str], standings_header_compact: list[str], standings_rules: tuple[int, ...],
+                 playoff_rules: list[tuple[str, int]] = [], simulation_outcomes: list[tuple[str, dict[str, int], dict[str, int]]] = [],
+                 clinch_rules: list[tuple[str, str, Optional[str], int]] = []) -> None:
         self.teams: dict[int, Team] = {}
         self.games: dict[int, Game] = {}
+        # game ids by start time, team and status, kept current per game like the standings
+        self.game_index = GameIndex()
+        self.stats_store = StatsStore(self.team_cls.stat_names)
+        # live standings = official stats + deltas from games currently "Live", kept per game rather than rebuilt per request
+        self.live_delta_store = StatsStore(self.team_cls.stat_names)
+        self.live_store = StatsStore(self.team_cls.stat_names)
+        self._live_delta_teams: dict[int, Team] = {}
+        self._live_teams: dict[int, Team] = {}
+        self._live_stale = False
+        # standings rule tuples and finished standings lines per team id, dropped only when that team's stats change, and
+        # rankings per (conference, division, limit), dropped on any change (see _stats_changed)
+        self._sort_keys: dict[int, tuple[int, ...]] = {}
+        self._live_sort_keys: dict[int, tuple[int, ...]] = {}
+        self._lines: dict[int, list[int | float | str]] = {}
+        self._live_lines: dict[int, list[int | float | str]] = {}
+        self._rankings: dict[tuple, list[int]] = {}
+        self._live_rankings: dict[tuple, list[int]] = {}
+        # team ids by group, eg members["division"]["Central"]
+        self.members: dict[str, dict[str, list[int]]] = {"conference": {}, "division": {}}
+        # head_to_head[a, b]: points team a (store index) earned in final games against team b
+        self.head_to_head = np.zeros((0, 0), dtype=np.int32)
+        # games between teams a and b (store indices, either venue) already final / still to play, for strength of schedule
+        self.played_games = np.zeros((0, 0), dtype=np.int32)
+        self.remaining_games = np.zeros((0, 0), dtype=np.int32)
+        self.coin_flip_seed = 0
+        # called with (game_id, game, changed fields) after every game change, eg by utils.event_log.GameEventLog
+        self.game_listeners: list[Callable[[int, Game, dict[str, Any]], None]] = []
+        # how likely each outcome of a remaining game is; kept fitted per final game (see _apply_game)
+        self.outcome_model: OutcomeModel = UniformOutcomeModel()
+        # cached simulation batch for what_if, dropped whenever the remaining schedule or official results change
+        self._what_if_batch: Optional[simulation.SimulationBatch] = None
         self.standings_header = standings_header
         self.standings_header_compact = standings_header_compact
         self.standings_rules = standings_rules
+        self.playoff_rules = playoff_rules
+        self.simulation_outcomes = simulation_outcomes
+        self.clinch_rules = clinch_rules
 
     def add_team(self, name: str) -> None:
-        self.teams[len(self.teams)] = Team(name)
+        self._add_team(len(self.teams), Team(name, store=self.stats_store))
 
     def get_standings_header(self, compact:bool):
         return self.standings_header_compact if compact else self.standings_header
 
-    # TODO
-    # remove stats from Team - should be running calcs over Games, maybe persisting them in Season?
-    # - once a game is Final, it won't be changing - makes sense to persist official standings, validate them occasionally?
-    # - then use this same code, but filter the official standings (will need to add conference/division to those objects)
-    # - then use simulate_games with deepcopy as shown
+    # official standings are persisted in stats_store and kept current per game (see _apply_game), live standings add an
+    # overlay of in-progress games on top (see live_teams). Lines are cached per team and shared between calls, so treat
+    # them as read-only.
     def standings(self, conference: str = None, division: str = None, live: bool = False):
-        teams = self.teams.values() if not live else self.simulate_games(filter(lambda g: g.status == "Live", self.games.values()))
+        lines = self._live_lines if live else self._lines
+        result = []
+        for id in self.rank(conference, division, live):
+            line = lines.get(id)
+            if line is None:
+                line = lines[id] = (self.live_teams() if live else self.teams)[id].snapshot().standings_line()
+            result.append(line)
+        return result
+
+    def sort_key(self, id: int, live: bool = False) -> tuple[int, ...]:
+        keys = self._live_sort_keys if live else self._sort_keys
+        key = keys.get(id)
+        if key is None:
+            key = keys[id] = self.standings_rules((self.live_teams()[id] if live else self.teams[id]).snapshot())
+        return key
+
+    # team ids in standings order; with `limit`, only the top `limit` teams (partial ranking, O(n log limit))
+    def rank(self, conference: str = None, division: str = None, live: bool = False, limit: Optional[int] = None) -> list[int]:
+        rankings = self._live_rankings if live else self._rankings
+        ranked = rankings.get((conference, division, limit))
+        if ranked is None:
+            ranked = rankings[(conference, division, limit)] = self._rank(conference, division, live, limit)
+        return list(ranked)
 
+    def _rank(self, conference: Optional[str], division: Optional[str], live: bool, limit: Optional[int]) -> list[int]:
         if division is not None:
-            standings_teams = filter(lambda t: t.get_division() == division, teams)
+            ids = self.members["division"].get(division, [])
         elif conference is not None:
-            standings_teams = filter(lambda t: t.get_conference() == conference, teams)
+            ids = self.members["conference"].get(conference, [])
+        else:
+            ids = self.teams
+        key = lambda id: self.sort_key(id, live)
+        if self.head_to_head_rule is None and not self.coin_flip:
+            return sorted(ids, key=key, reverse=True) if limit is None else nlargest(limit, ids, key=key)
+
+        if limit is None:
+            ranked = sorted(ids, key=key, reverse=True)
         else:
-            standings_teams = teams
-        
-        return [t.standings_line() for t in sorted(standings_teams, key=self.standings_rules, reverse=True)]
+            # a tied group straddling the cutoff has to be broken as a whole
+            ranked = nlargest(limit, ids, key=key)
+            if ranked:
+                edge = self._tie_key(ranked[-1], live)
+                ranked = sorted(set(ranked) | {id for id in ids if self._tie_key(id, live) == edge}, key=key, reverse=True)
+        return self._break_ties(ranked, key, self.head_to_head)[:limit]
+
+    def _tie_key(self, id: int, live: bool) -> tuple[int, ...]:
+        return self.sort_key(id, live)[:self.head_to_head_rule]
+
+    # tiebreaker engine: teams level on every rule before head_to_head_rule are re-sorted by points earned in games
+    # among themselves (from a head_to_head matrix) and then by the remaining rules; teams still level after everything
+    # are split by a coin flip that is seeded by the tied group, so the same tie always breaks the same way. `key` gives
+    # each team's standings rules tuple. Live standings use official head-to-head results.
+    def _break_ties(self, ranked: list[int], key: Callable[[int], tuple[int, ...]], head_to_head: np.ndarray) -> list[int]:
+        result = []
+        start = 0
+        while start < len(ranked):
+            end = start + 1
+            while end < len(ranked) and key(ranked[end])[:self.head_to_head_rule] == key(ranked[start])[:self.head_to_head_rule]:
+                end += 1
+            tied = ranked[start:end]
+            if len(tied) > 1:
+                keys = {id: self._full_key(id, tied, key, head_to_head) for id in tied}
+                tied.sort(key=keys.get, reverse=True)
+            result += tied
+            start = end
+        return result
+
+    def _full_key(self, id: int, tied: list[int], key: Callable[[int], tuple[int, ...]], head_to_head: np.ndarray) -> tuple:
+        full = key(id)
+        if self.head_to_head_rule is not None:
+            row = head_to_head[self.teams[id].stats.index]
+            full = full[:self.head_to_head_rule] + (int(sum(row[self.teams[o].stats.index] for o in tied)),) + full[self.head_to_head_rule:]
+        if self.coin_flip:
+            full += (random.Random(f"{self.coin_flip_seed}:{sorted(tied)}:{id}").random(),)
+        return full
+
+    # team id in a given (1-based) standings position, eg team_at(8, conference="Western") for the last playoff spot
+    def team_at(self, position: int, conference: str = None, division: str = None, live: bool = False) -> Optional[int]:
+        top = self.rank(conference, division, live, limit=position)
+        return top[position - 1] if len(top) >= position else None
+
+    # game ids in start order: games starting from `start` to `end` (inclusive), eg the day's games for the midnight job
+    def games_between(self, start: datetime, end: datetime) -> list[int]:
+        return self.game_index.between(start, end)
+
+    def live_games(self) -> list[int]:
+        return list(self.game_index.with_status(self.live_status))
+
+    # a team's games in start order, or only the ones not final yet
+    def team_schedule(self, team_id: int, remaining: bool = False) -> list[int]:
+        return self.game_index.team_games(team_id, excluding=self.final_status if remaining else None)
 
     # use this for projections and also for live standings
-    # TODO override in subclasses
     def simulate_games(self, games: list[Game]) -> None:
-        simulated_teams = deepcopy(self.teams)
+        store = self.stats_store.copy()
+        simulated_teams = {id: team.with_store(store) for id, team in self.teams.items()}
         for game in games:
-            simulated_teams[game.home_id].update_stats(game.home_score, game.away_score)
-            simulated_teams[game.away_id].update_stats(game.away_score, game.home_score)
+            self.record_game(simulated_teams, game)
         return simulated_teams
 
-    def validate_standings(self) -> None:
-        # TODO
-        pass
+    # standings points earned by (home, away) in a final game
+    def game_points(self, game: Game) -> tuple[int, int]:
+        if game.home_score > game.away_score:
+            return self.win_points, 0
+        if game.home_score == game.away_score:
+            return self.tie_points, self.tie_points
+        return 0, self.win_points
+
+    def _record_head_to_head(self, game: Game, sign: int = 1) -> None:
+        home, away = self.teams[game.home_id].stats.index, self.teams[game.away_id].stats.index
+        home_points, away_points = self.game_points(game)
+        self.head_to_head[home, away] += sign*home_points
+        self.head_to_head[away, home] += sign*away_points
+
+    # add (sign=1) or take back (sign=-1) one game's result in the given teams' stats
+    def record_game(self, teams: dict[int, Team], game: Game, sign: int = 1) -> None:
+        teams[game.home_id].update_stats(game.home_score, game.away_score, sign)
+        teams[game.away_id].update_stats(game.away_score, game.home_score, sign)
+
+    # an in-progress game in the live standings overlay; by default counted as if it ended with the current score
+    def record_live_game(self, teams: dict[int, Team], game: Game, sign: int = 1) -> None:
+        self.record_game(teams, game, sign)
+
+    def _add_team(self, id: int, team: Team) -> None:
+        self.teams[id] = team
+        self.head_to_head = np.pad(self.head_to_head, (0, 1))
+        self.played_games = np.pad(self.played_games, (0, 1))
+        self.remaining_games = np.pad(self.remaining_games, (0, 1))
+        for group, members in self.members.items():
+            if getattr(team, group) is not None:
+                members.setdefault(getattr(team, group), []).append(id)
+        self.live_delta_store.add_team()
+        self.live_store.add_team()
+        self._live_delta_teams[id] = team.with_store(self.live_delta_store)
+        self._live_teams[id] = team.with_store(self.live_store)
+        self._live_stale = True
+        self._rankings.clear()
+        self._live_rankings.clear()
+
+    # teams as of right now, including in-progress games; the combined stats are only rebuilt after a game changed
+    def live_teams(self) -> dict[int, Team]:
+        if self._live_stale:
+            np.add(self.stats_store.data, self.live_delta_store.data, out=self.live_store.data)
+            self._live_stale = False
+        return self._live_teams
+
+    def _add_game(self, game_id: int, game: Game) -> None:
+        if game_id in self.games:
+            self.games[game_id].update_fields(**game.fields())
+        else:
+            game._season = self
+            game._id = game_id
+            self.games[game_id] = game
+            self._game_changed(game, game.fields())
+
+    # called by Game.update_fields around every change, so official standings follow each game without a full recompute
+    def _game_changing(self, game: Game) -> None:
+        self._apply_game(game, -1)
+        self.game_index.remove(game._id, game.home_id, game.away_id, game.start, game.status)
+
+    def _game_changed(self, game: Game, changed: dict) -> None:
+        self._apply_game(game, 1)
+        self.game_index.add(game._id, game.home_id, game.away_id, game.start, game.status)
+        if game.status != self.live_status or "status" in changed:
+            self._what_if_batch = None
+        for listener in self.game_listeners:
+            listener(game._id, game, changed)
+
+    def _apply_game(self, game: Game, sign: int) -> None:
+        games = self.played_games if game.status == self.final_status else self.remaining_games
+        home, away = self.teams[game.home_id].stats.index, self.teams[game.away_id].stats.index
+        games[home, away] += sign
+        games[away, home] += sign
+        if game.status == self.final_status:
+            self.record_game(self.teams, game, sign)
+            self._record_head_to_head(game, sign)
+            self.outcome_model.observe(self, game, sign)
+            self._live_stale = True
+            self._stats_changed((game.home_id, game.away_id), official=True)
+        elif game.status == self.live_status:
+            self.record_live_game(self._live_delta_teams, game, sign)
+            self._live_stale = True
+            self._stats_changed((game.home_id, game.away_id), official=False)
+
+    # drop what was cached from these teams' official (and so also live) or only live stats; rankings also depend on
+    # head-to-head results and everyone else's stats, so they all go
+    def _stats_changed(self, team_ids: tuple[int, ...], official: bool) -> None:
+        caches = (self._live_sort_keys, self._live_lines) + ((self._sort_keys, self._lines) if official else ())
+        for cache in caches:
+            for id in team_ids:
+                cache.pop(id, None)
+        if official:
+            self._rankings.clear()
+        self._live_rankings.clear()
+
+    # full recompute of official standings from every final game, replacing the incrementally kept ones
+    def update_official_stats(self) -> None:
+        self.stats_store.reset()
+        self.head_to_head[...] = 0
+        self.played_games[...] = 0
+        self.remaining_games[...] = 0
+
+        # results go into plain-dict copies of the teams (see Team.snapshot) and the matrices in one np.add.at each,
+        # then the store is written back in one go
+        teams = {id: team.snapshot() for id, team in self.teams.items()}
+        index = {id: team.stats.index for id, team in self.teams.items()}
+        home, away, home_points, away_points = [], [], [], []
+        remaining_home, remaining_away = [], []
+        for game in self.games.values():
+            if game.status == self.final_status:
+                self.record_game(teams, game)
+                points = self.game_points(game)
+                home.append(index[game.home_id])
+                away.append(index[game.away_id])
+                home_points.append(points[0])
+                away_points.append(points[1])
+            else:
+                remaining_home.append(index[game.home_id])
+                remaining_away.append(index[game.away_id])
+        home, away, remaining_home, remaining_away = (np.array(column, dtype=np.intp) for column in (home, away, remaining_home, remaining_away))
+        for games, a, b in ((self.played_games, home, away), (self.remaining_games, remaining_home, remaining_away)):
+            np.add.at(games, (a, b), 1)
+            np.add.at(games, (b, a), 1)
+        np.add.at(self.head_to_head, (home, away), np.array(home_points, dtype=np.int32))
+        np.add.at(self.head_to_head, (away, home), np.array(away_points, dtype=np.int32))
+        for team, updated in zip(self.teams.values(), teams.values()):
+            self.stats_store.data[:, team.stats.index] = list(updated.stats.values())
+        self.outcome_model.fit(self)
+        self._live_stale = True
+        self._stats_changed(tuple(self.teams), official=True)
+        self._what_if_batch = None
+
+    def simulation_state(self) -> simulation.SimulationState:
+        team_ids = list(self.teams)
+        team_index = {id: i for i, id in enumerate(team_ids)}
+        teams = list(self.teams.values())
+        stat_names = self.stats_store.stat_names
+        index = [t.stats.index for t in teams]
+        stats = self.stats_store.data[:, index]
+
+        groups = {}
+        for group in {group for group, _ in self.playoff_rules}:
+            names = [getattr(t, group) for t in teams]
+            codes = {name: i for i, name in enumerate(dict.fromkeys(names))}
+            groups[group] = np.array([codes[name] for name in names], dtype=np.intp)
+
+        game_ids = self.game_index.ordered(excluding=self.final_status)
+        remaining = [self.games[id] for id in game_ids]
+        home = np.array([team_index[g.home_id] for g in remaining], dtype=np.intp)
+        away = np.array([team_index[g.away_id] for g in remaining], dtype=np.intp)
+
+        labels = [label for label, _, _ in self.simulation_outcomes]
+        home_deltas = np.array([[h.get(name, 0) for name in stat_names] for _, h, _ in self.simulation_outcomes], dtype=np.int32)
+        away_deltas = np.array([[a.get(name, 0) for name in stat_names] for _, _, a in self.simulation_outcomes], dtype=np.int32)
+        probs = self.outcome_model.probabilities(self, np.array(index, dtype=np.intp)[home], np.array(index, dtype=np.intp)[away])
+
+        return simulation.SimulationState(team_ids, game_ids, self.team_cls, self.standings_rules, self.playoff_rules, stat_names,
+                                          stats, groups, home, away, labels, home_deltas, away_deltas, probs,
+                                          self.head_to_head[np.ix_(index, index)], self.head_to_head_rule)
+
+    # fraction of simulations of the remaining schedule in which each team makes the playoffs
+    def simulate_playoff_odds(self, n_sims: int, seed: Optional[int] = None) -> dict[int, float]:
+        state = self.simulation_state()
+        counts = simulation.playoff_counts(state, n_sims, np.random.default_rng(seed))
+        return {id: float(count/n_sims) for id, count in zip(state.team_ids, counts)}
+
+    # strength of schedule per team from the played/remaining games matrices and every team's points percentage (live
+    # standings with live=True): {team_id: {"past", "remaining", "adjusted"}}. Past and remaining are the average points
+    # percentage of the opponents in those games; adjusted weights past 2:1 with its own average over the same opponents
+    # (opponents' strength of schedule, as in RPI). All three are one matrix-vector product each.
+    def strength_of_schedule(self, live: bool = False) -> dict[int, dict[str, float]]:
+        if live:
+            self.live_teams()
+        team = self.team_cls.from_store(self.live_store if live else self.stats_store)
+        games_played = np.asarray(team.get_games_played(), dtype=float)
+        percentage = np.divide(np.asarray(team.get_points(), dtype=float), self.win_points*games_played,
+                               out=np.zeros_like(games_played), where=games_played > 0)
+
+        def average(games: np.ndarray, values: np.ndarray) -> np.ndarray:
+            counts = games.sum(axis=1)
+            return np.divide(games @ values, counts, out=np.zeros(len(values)), where=counts > 0)
+
+        past = average(self.played_games, percentage)
+        remaining = average(self.remaining_games, percentage)
+        adjusted = (2*past + average(self.played_games, past))/3
+        return {id: {"past": float(past[i]), "remaining": float(remaining[i]), "adjusted": float(adjusted[i])}
+                for id, i in ((id, t.stats.index) for id, t in self.teams.items())}
+
+    # "most important games": how each result of each remaining game moves every team's playoff odds, from one batch of
+    # simulations conditioned on that result: {game_id: {"importance", "shifts": {outcome: {team_id: change in odds}}}},
+    # most important first. Importance is the expected total change in odds over all teams, weighting each outcome by how
+    # often it came up; an outcome that never came up has no shifts.
+    def game_leverage(self, n_sims: int, seed: Optional[int] = None, limit: Optional[int] = None) -> dict[int, dict[str, Any]]:
+        state = self.simulation_state()
+        counts, outcome_counts, joint = simulation.outcome_playoff_counts(state, n_sims, np.random.default_rng(seed))
+        odds = counts/n_sims
+        with np.errstate(invalid="ignore", divide="ignore"):
+            shifts = joint/outcome_counts[..., None] - odds
+        shifts[outcome_counts == 0] = 0.0
+        importance = ((outcome_counts/n_sims)[..., None]*np.abs(shifts)).sum(axis=(1, 2))
+
+        leverage = {}
+        for g in np.argsort(-importance, kind="stable")[:limit]:
+            leverage[state.game_ids[g]] = {
+                "importance": float(importance[g]),
+                "shifts": {label: {id: float(shift) for id, shift in zip(state.team_ids, shifts[g, o])}
+                           for o, label in enumerate(state.outcome_labels) if outcome_counts[g, o]}
+            }
+        return leverage
+
+    # the shared, read-only simulation batch what-if scenarios are rewritten from; drawn once per schedule state
+    def what_if_batch(self, n_sims: int = 2_000, seed: Optional[int] = None) -> simulation.SimulationBatch:
+        batch = self._what_if_batch
+        if batch is None or batch.n_sims() != n_sims or (seed is not None and batch.seed != seed):
+            batch = self._what_if_batch = simulation.simulation_batch(self.simulation_state(), n_sims, seed)
+        return batch
+
+    # "What if?": standings and playoff odds with some remaining games' results pinned, eg {game_id: "away OT"} (labels
+    # from simulation_outcomes). Standings count only the official results plus the pinned games and break ties exactly
+    # as Season.standings does, so only teams whose stats or tied group the pinned games change can move; odds come from
+    # the cached batch with just the pinned games rewritten in every simulation, so nothing is redrawn and the season
+    # itself is never copied or changed.
+    def what_if(self, pinned_outcomes: dict[int, str], n_sims: int = 2_000, seed: Optional[int] = None) -> dict[str, Any]:
+        batch = self.what_if_batch(n_sims, seed)
+        state = batch.state
+        labels = {label: o for o, label in enumerate(state.outcome_labels)}
+        for id, label in pinned_outcomes.items():
+            if id not in batch.game_index:
+                raise ValueError(f"game {id} is not a remaining game")
+            if label not in labels:
+                raise ValueError(f"unknown outcome {label!r}, expected one of {state.outcome_labels}")
+        games = np.array([batch.game_index[id] for id in pinned_outcomes], dtype=np.intp)
+        pinned = np.array([labels[label] for label in pinned_outcomes.values()], dtype=np.intp)
+        if not len(games):
+            return {"standings": self.standings(), "odds": dict(zip(state.team_ids, batch.odds.tolist()))}
+
+        store = self.stats_store.copy()
+        teams = {id: team.with_store(store) for id, team in self.teams.items()}
+        head_to_head = self.head_to_head.copy()
+        for g, o in zip(games, pinned):
+            home = teams[state.team_ids[state.home[g]]].stats.index
+            away = teams[state.team_ids[state.away[g]]].stats.index
+            store.data[:, home] += state.home_deltas[o]
+            store.data[:, away] += state.away_deltas[o]
+            head_to_head[home, away] += state.home_points[o]
+            head_to_head[away, home] += state.away_points[o]
+        keys = {id: self.standings_rules(team.snapshot()) for id, team in teams.items()}
+        order = sorted(teams, key=keys.get, reverse=True)
+        if self.head_to_head_rule is not None or self.coin_flip:
+            order = self._break_ties(order, keys.get, head_to_head)
+
+        outcomes, stats = batch.pin(games, pinned)
+        odds = batch.playoff_odds(outcomes, stats)
+        return {"standings": [teams[id].standings_line() for id in order],
+                "odds": dict(zip(state.team_ids, odds.tolist()))}
+
+    # clinched/eliminated status and magic numbers per team, for the playoffs and each of the season's clinch_rules:
+    # {team_id: {cutoff: {"clinched", "eliminated", "magic_number", "tragic_number"}}}. Points only, see ClinchSolver;
+    # "clinched"/"eliminated" are None when the solver ran out of time before settling them (see ClinchSolver).
+    # Magic number: points gained by the team plus points dropped by its chasers needed to clinch; tragic number: the same
+    # the other way round, to be eliminated.
+    def clinch_status(self) -> dict[int, dict[str, dict[str, Optional[bool] | int]]]:
+        team_ids = list(self.teams)
+        team_index = {id: i for i, id in enumerate(team_ids)}
+        index = [t.stats.index for t in self.teams.values()]
+        remaining = self.remaining_games[np.ix_(index, index)].tolist()
+        solver = ClinchSolver([t.get_points() for t in self.teams.values()], remaining, self.win_points, self.tie_points,
+                              self.max_game_points)
+        groups = {group: [getattr(t, group) for t in self.teams.values()] for group, _ in self.playoff_rules}
+
+        def others(i: int, group: Optional[str]) -> list[int]:
+            ids = team_ids if group is None else self.members[group][getattr(self.teams[team_ids[i]], group)]
+            return [team_index[id] for id in ids if team_index[id] != i]
+
+        # does team i miss the playoffs when exactly the teams `above` finish level with or ahead of it? Everyone else is
+        # behind it, so at each stage only how many of `above` are still eligible in its group matters (eg a wild card is
+        # lost when 3 division rivals and 2 non-division-qualifiers in the conference are above it). Assumes each stage's
+        # group is made up of whole groups of the stages before it, as divisions make up conferences.
+        def misses_playoffs(i: int, above: list[int]) -> bool:
+            eligible = above
+            for group, spots in self.playoff_rules:
+                codes = groups[group]
+                if sum(codes[j] == codes[i] for j in eligible) < spots:
+                    return False
+                # all but the first `spots` of each group go on to the next stage
+                seen = {}
+                later = []
+                for j in eligible:
+                    seen[codes[j]] = seen.get(codes[j], 0) + 1
+                    if seen[codes[j]] > spots:
+                        later.append(j)
+                eligible = later
+            return True
+
+        # `made()`: whether the team makes the cutoff in the current table, which settles it once neither the team nor any
+        # rival has a game left (points ties then go by the tiebreakers rather than against the team)
+        def cutoff(i: int, rivals: list[int], beaten: Callable[[list[int]], bool], made: Callable[[], bool]) -> dict[str, Optional[bool] | int]:
+            if not any(solver.games_left[j] for j in rivals + [i]):
+                clinched = made()
+                eliminated = not clinched
+            else:
+                clinched = solver.clinched(i, rivals, beaten)
+                eliminated = False if clinched else solver.eliminated(i, rivals, beaten)
+            # magic: the fewest points the team needs for the rivals that could still reach them not to beat it; tragic:
+            # the smallest drop in its most possible points for the rivals already past that to beat it
+            points, most = solver.points[i], solver.max_points(i)
+            magic = min((p for p in [points] + [solver.max_points(j) + 1 for j in rivals]
+                         if p >= points and not beaten([j for j in rivals if solver.max_points(j) >= p])), default=points) - points
+            tragic = min((t for t in sorted({max(1, most - solver.points[j] + 1) for j in rivals})
+                          if beaten([j for j in rivals if solver.points[j] > most - t])), default=most + 1)
+            return {"clinched": clinched, "eliminated": eliminated,
+                    "magic_number": 0 if clinched else magic, "tragic_number": 0 if eliminated else tragic}
+
+        status = {}
+        for i, id in enumerate(team_ids):
+            status[id] = {}
+            for name, _, group, spots in self.clinch_rules:
+                kwargs = {} if group is None else {group: getattr(self.teams[id], group)}
+                status[id][name] = cutoff(i, others(i, group), lambda above, spots=spots: len(above) >= spots,
+                                          lambda id=id, kwargs=kwargs, spots=spots: id in self.rank(**kwargs, limit=spots))
+            # the playoffs are settled over every stage at once (eg a team that is in through its division in some outcomes
+            # and through a wild card in the rest has clinched), against every team sharing one of its stage groups
+            rivals = sorted({j for group, _ in self.playoff_rules for j in others(i, group)})
+            status[id]["playoffs"] = cutoff(i, rivals, lambda above, i=i: misses_playoffs(i, above),
+                                            lambda id=id: id in self.playoff_teams())
+        return status
+
+    # team ids making the playoffs from the current table: each stage takes the top teams of every group (ranked within
+    # that group) that didn't get in at an earlier stage
+    def playoff_teams(self, live: bool = False) -> set[int]:
+        qualified = set()
+        for group, spots in self.playoff_rules:
+            for name in self.members[group]:
+                qualified.update([id for id in self.rank(**{group: name}, live=live) if id not in qualified][:spots])
+        return qualified
+
+    # standings markers: the most significant clinch_rules title clinched, else x (playoff spot) or e (eliminated); an
+    # unknown (None) status gets no marker
+    def clinch_markers(self) -> dict[int, str]:
+        markers = {}
+        for id, status in self.clinch_status().items():
+            titles = [marker for name, marker, _, _ in self.clinch_rules if status[name]["clinched"]]
+            markers[id] = titles[0] if titles else "x" if status["playoffs"]["clinched"] else "e" if status["playoffs"]["eliminated"] else ""
+        return markers
+
+    # check the incrementally maintained official standings against a full recompute (which then replaces them)
+    def validate_standings(self) -> bool:
+        current = lambda: (self.stats_store.data, self.head_to_head, self.played_games, self.remaining_games)
+        incremental = [array.copy() for array in current()]
+        self.update_official_stats()
+        return all(np.array_equal(before, after) for before, after in zip(incremental, current()))
+
+    # swap in another outcome model (classes.outcome_models) for simulations; it is fitted once here and then kept
+    # current game by game
+    def set_outcome_model(self, model: OutcomeModel) -> None:
+        model.fit(self)
+        self.outcome_model = model
+        self._what_if_batch = None
+
+    # index into simulation_outcomes of a final game's result
+    def game_outcome(self, game: Game) -> int:
+        raise NotImplementedError(f"{type(self).__name__} has no simulation outcomes")
+
+    # (n_games, n_outcomes) simulation_outcomes probabilities from per-game regulation win/draw/loss odds, the home side's
+    # share of any extra period and the season's outcome frequencies (see outcome_models.PoissonOutcomeModel)
+    def outcome_table(self, home_win: np.ndarray, draw: np.ndarray, away_win: np.ndarray, home_edge: np.ndarray,
+                      frequencies: np.ndarray) -> np.ndarray:
+        raise NotImplementedError(f"{type(self).__name__} has no simulation outcomes")
+
+    # (url, query params) to fetch one game's current state; used by utils.live_poller.LivePoller
+    def live_game_request(self, game_id: int) -> tuple[str, dict[str, Any]]:
+        raise NotImplementedError(f"{type(self).__name__} has no live game feed")
+
+    # (fields for Game.update, seconds left in an intermission/halftime or None) from a live_game_request response
+    def parse_live_game(self, payload: dict[str, Any]) -> tuple[dict[str, Any], Optional[float]]:
+        raise NotImplementedError(f"{type(self).__name__} has no live game feed")
 
     def json(self):
         return json.dumps({"teams": self.teams, "games": self.games}, default=serializer, sort_keys=True)
 
 class MLSSeason(Season):
+    team_cls: type = MLSTeam
+    game_cls: type = MLSGame
+    final_status: str = "FullTime"
+    win_points: int = 3
+    tie_points: int = 1
+    max_game_points: int = 3
+    coin_flip: bool = True
+
     # TODO: are these overrides necessary?
     @override
     def __init__(self, start_year: int) -> None:
-        super().__init__(mls_standings_header, mls_standings_header_compact, mls_standings_rules)
+        super().__init__(mls_standings_header, mls_standings_header_compact, mls_standings_rules, mls_playoff_rules,
+                         mls_simulation_outcomes, mls_clinch_rules)
         self.teams: dict[int, MLSTeam] = {}
         self.games: dict[int, MLSGame] = {}
+        self.start_year = start_year
+        self.coin_flip_seed = start_year
 
     @override
     def add_team(self, name: str, short_name: str, conference: Literal["Western", "Eastern"], id: int = None) -> None:
         id = len(self.teams) if id is None else id
-        self.teams[id] = MLSTeam(name, short_name, conference)
+        self._add_team(id, MLSTeam(name, short_name, conference, self.stats_store))
 
     def add_game(self, game_id: int, home_id: int, away_id: int, start_datetime: datetime, status: str, home_score: int = 0, 
                  away_score: int = 0, home_disciplinary_points: int = 0, away_disciplinary_points: int = 0) -> None:
-        self.games[game_id] = MLSGame(home_id, away_id, start_datetime, status, home_score, away_score,
-                                      home_disciplinary_points, away_disciplinary_points)
+        self._add_game(game_id, MLSGame(home_id, away_id, start_datetime, status, home_score, away_score,
+                                        home_disciplinary_points, away_disciplinary_points))
 
     @override
-    def standings(self, conference: Optional[Literal["Western", "Eastern"]] = None):
-        return super().standings(conference)
+    def standings(self, conference: Optional[Literal["Western", "Eastern"]] = None, live: bool = False):
+        return super().standings(conference, live=live)
     
-    def update_official_stats(self):
-        for team in self.teams.values():
-            team.reset_stats()
+    @override
+    def record_game(self, teams: dict[int, MLSTeam], game: MLSGame, sign: int = 1) -> None:
+        teams[game.home_id].update_stats(game.home_score, game.away_score, True, game.home_disciplinary_points, sign)
+        teams[game.away_id].update_stats(game.away_score, game.home_score, False, game.away_disciplinary_points, sign)
 
-        for game in self.games.values():
-            if game.status == "FullTime":
-                self.teams[game.home_id].update_stats(game.home_score, game.away_score, True, 0)
-                self.teams[game.away_id].update_stats(game.away_score, game.home_score, False, 0)
+    @override
+    def game_outcome(self, game: MLSGame) -> int:
+        return 0 if game.home_score > game.away_score else 1 if game.home_score == game.away_score else 2
+
+    @override
+    def outcome_table(self, home_win: np.ndarray, draw: np.ndarray, away_win: np.ndarray, home_edge: np.ndarray,
+                      frequencies: np.ndarray) -> np.ndarray:
+        return np.column_stack([home_win, draw, away_win])
     
 
 class NHLSeason(Season):
+    team_cls: type = NHLTeam
+    game_cls: type = NHLGame
+    max_game_points: int = 3        # overtime/shootout: 2 to the winner, 1 to the loser
+    head_to_head_rule: Optional[int] = 5
+    schedule_url: str = "https://statsapi.web.nhl.com/api/v1/schedule"
+
     @override
     def __init__(self, start_year: int, import_json: Optional[dict[Literal["games", "teams"], dict[str, int | str | dict[str, int]]]] = None) -> None:
-        super().__init__(nhl_standings_header, nhl_standings_header_compact, nhl_standings_rules)
+        super().__init__(nhl_standings_header, nhl_standings_header_compact, nhl_standings_rules, nhl_playoff_rules,
+                         nhl_simulation_outcomes, nhl_clinch_rules)
         self.teams: dict[int, NHLTeam] = {}
         self.games: dict[int, NHLGame] = {}
+        self.start_year = start_year
         self.status_mappings = {
             "Preview": "Scheduled",
             "Live": "Live",
@@ -132,12 +687,12 @@ class NHLSeason(Season):
         }
 
         if import_json is not None:
+            # keys are strings once the dict has been through Season.json
             for id, team in import_json["teams"].items():
-                self.add_team(team['name'], team['short_name'], team['team_name'], team['conference'], team['division'], id)
+                self.add_team(team['name'], team['short_name'], team['team_name'], team['conference'], team['division'], int(id))
             for id, game in import_json["games"].items():
-                self.add_game(id, game['home_id'], game['away_id'], datetime.fromisoformat(team['start_datetime']), game['status'], game['home_score'],
+                self.add_game(int(id), game['home_id'], game['away_id'], datetime.fromisoformat(game['start']), game['status'], game['home_score'],
                               game['away_score'], game['result_type'])
-            self.update_official_stats()
         else:
             # TODO push this down to Team object?
             teams_params = { "season": f'{start_year}{start_year+1}' }
@@ -155,17 +710,33 @@ class NHLSeason(Season):
                 'gameType': 'R'                            # "R" = Regular season; "P" = Playoffs
             }
             # TODO push this down to Game object?
-            schedule_url = "https://statsapi.web.nhl.com/api/v1/schedule"
-            games = requests.get(schedule_url, params=schedule_params, timeout=30).json()
+            games = requests.get(self.schedule_url, params=schedule_params, timeout=30).json()
             for date in games['dates']:
                 for game in date['games']:
-                    result_type = "R" if game['linescore']['currentPeriod'] < 4 else game['linescore']['currentPeriodOrdinal']
                     # TODO scheduled, in-progress games?
                     self.add_game(game['gamePk'], game['teams']['home']['team']['id'], game['teams']['away']['team']['id'],
-                                datetime.fromisoformat(game['gameDate']), self.status_mappings[game['status']['abstractGameState']],
-                                game['teams']['home']['score'], game['teams']['away']['score'], result_type)
+                                  datetime.fromisoformat(game['gameDate']), **self.parse_schedule_game(game))
 
-            self.update_official_stats(reset_stats = False)
+    # status/score fields of a schedule entry (hydrated with linescore), as taken by add_game/NHLGame.update
+    def parse_schedule_game(self, game: dict[str, Any]) -> dict[str, Any]:
+        result_type = "R" if game['linescore']['currentPeriod'] < 4 else game['linescore']['currentPeriodOrdinal']
+        return {
+            "status": self.status_mappings[game['status']['abstractGameState']],
+            "home_score": game['teams']['home']['score'],
+            "away_score": game['teams']['away']['score'],
+            "result_type": result_type
+        }
+
+    @override
+    def live_game_request(self, game_id: int) -> tuple[str, dict[str, Any]]:
+        return self.schedule_url, {"gamePk": game_id, "hydrate": "linescore"}
+
+    @override
+    def parse_live_game(self, payload: dict[str, Any]) -> tuple[dict[str, Any], Optional[float]]:
+        game = payload['dates'][0]['games'][0]
+        intermission = game['linescore'].get('intermissionInfo', {})
+        seconds_left = intermission.get('intermissionTimeRemaining') if intermission.get('inIntermission') else None
+        return self.parse_schedule_game(game), seconds_left
 
     @override
     def add_team(self, name: str, short_name: str, team_name: str, conference: Literal["Western", "Eastern"],
@@ -176,35 +747,45 @@ class NHLSeason(Season):
             raise ValueError()
 
         id = len(self.teams) if id is None else id
-        self.teams[id] = NHLTeam(name, short_name, team_name, conference, division)
+        self._add_team(id, NHLTeam(name, short_name, team_name, conference, division, self.stats_store))
 
     def add_game(self, game_id: int, home_id: int, away_id: int, start_datetime: datetime, status: str,
                         home_score: int = 0, away_score: int = 0, result_type: Literal["R", "OT", "SO"] = None) -> None:
-        self.games[game_id] = NHLGame(home_id, away_id, start_datetime, status, home_score, away_score, result_type)
+        self._add_game(game_id, NHLGame(home_id, away_id, start_datetime, status, home_score, away_score, result_type))
 
     @override
     def standings(self, conference: Optional[Literal["Western", "Eastern"]] = None, 
-                  division: Optional[Literal['Central', 'Pacific', 'Metropolitan', 'Atlantic']] = None):
-        return super().standings(conference, division)
+                  division: Optional[Literal['Central', 'Pacific', 'Metropolitan', 'Atlantic']] = None, live: bool = False):
+        return super().standings(conference, division, live)
     
-    # TODO - update non-final games with starttime before now - for tracking live games
-    # - should be an .update() method on Game object?
-    # def update_official_results(self) -> None:
-    #     for (id, game) in filter(lambda k,g: g.status != "Final" and g.start < datetime.now(), self.games.items()):
-    #         # game_url = f"{id}"
-    #         # updated_game = requests.get(game_url, )
-    #         result_type = "R" if updated_game['linescore']['currentPeriod'] < 4 else updated_game['linescore']['currentPeriodOrdinal']
-    #         self.add_game(updated_game['gamePk'], updated_game['teams']['home']['team']['id'], updated_game['teams']['away']['team']['id'],
-    #                              datetime.fromisoformat(updated_game['gameDate']), self.status_mappings[updated_game['status']['abstractGameState']],
-    #                              updated_game['teams']['home']['score'], updated_game['teams']['away']['score'], result_type)
-
-    # TODO this can probably be promoted to Season?
-    def update_official_stats(self, reset_stats: bool = True):
-        if reset_stats:
-            for team in self.teams.values():
-                team.reset_stats()
+    @override
+    def game_points(self, game: NHLGame) -> tuple[int, int]:
+        loser_points = 1 if game.result_type in ("OT", "SO") else 0
+        return (2, loser_points) if game.home_score > game.away_score else (loser_points, 2)
 
-        for game in self.games.values():
-            if game.status == "Final":
-                self.teams[game.home_id].update_stats(game.home_score, game.away_score, game.result_type)
-                self.teams[game.away_id].update_stats(game.away_score, game.home_score, game.result_type)
\ No newline at end of file
+    @override
+    def record_game(self, teams: dict[int, NHLTeam], game: NHLGame, sign: int = 1) -> None:
+        teams[game.home_id].update_stats(game.home_score, game.away_score, game.result_type, sign)
+        teams[game.away_id].update_stats(game.away_score, game.home_score, game.result_type, sign)
+
+    # the leader of an in-progress game gets a regulation win whatever period it's in (result_type is ignored), and a game
+    # that's level isn't counted (no points, games played or goals) until someone leads or it ends
+    @override
+    def record_live_game(self, teams: dict[int, NHLTeam], game: NHLGame, sign: int = 1) -> None:
+        if game.home_score == game.away_score:
+            return
+        teams[game.home_id].update_stats(game.home_score, game.away_score, "R", sign)
+        teams[game.away_id].update_stats(game.away_score, game.home_score, "R", sign)
+
+    @override
+    def game_outcome(self, game: NHLGame) -> int:
+        return (0 if game.home_score > game.away_score else 3) + ("R", "OT", "SO").index(game.result_type or "R")
+
+    # games level after regulation go to overtime or a shootout as often as they have this season
+    @override
+    def outcome_table(self, home_win: np.ndarray, draw: np.ndarray, away_win: np.ndarray, home_edge: np.ndarray,
+                      frequencies: np.ndarray) -> np.ndarray:
+        overtime = (frequencies[1] + frequencies[4])/(frequencies[1] + frequencies[2] + frequencies[4] + frequencies[5])
+        home_extra, away_extra = draw*home_edge, draw*(1 - home_edge)
+        return np.column_stack([home_win, home_extra*overtime, home_extra*(1 - overtime),
+                                away_win, away_extra*overtime, away_extra*(1 - overtime)])
@@ -0,0 +1,217 @@
+from classes.stats import StatsStore
+from typing import Callable, Optional
+import numpy as np
+
+# Vectorized simulation of a season's remaining schedule. Everything here works on plain arrays
+# (teams are indexed densely, in Season.teams order) so a batch of simulations never touches Team/Game objects.
+
+class SimulationState:
+    def __init__(self, team_ids: list[int], game_ids: list[int], team_cls: type, standings_rules: Callable, playoff_rules: list[tuple[str, int]],
+                 stat_names: list[str], stats: np.ndarray, groups: dict[str, np.ndarray], home: np.ndarray, away: np.ndarray,
+                 outcome_labels: list[str], home_deltas: np.ndarray, away_deltas: np.ndarray, outcome_probs: np.ndarray,
+                 head_to_head: np.ndarray, head_to_head_rule: Optional[int]) -> None:
+        self.team_ids = team_ids
+        self.game_ids = game_ids                # (n_games,) Season.games id of each remaining game
+        self.team_cls = team_cls
+        self.standings_rules = standings_rules
+        self.playoff_rules = playoff_rules
+        self.stat_names = stat_names
+        self.stats = stats                      # (n_stats, n_teams) current official stats
+        self.groups = groups                    # group name ("division", "conference", ...) -> group code per team
+        self.home = home                        # (n_games,) dense index of home team for each remaining game
+        self.away = away                        # (n_games,) dense index of away team
+        self.outcome_labels = outcome_labels
+        self.home_deltas = home_deltas          # (n_outcomes, n_stats) stats added to the home team for each outcome
+        self.away_deltas = away_deltas          # (n_outcomes, n_stats) stats added to the away team for each outcome
+        self.outcome_probs = outcome_probs      # (n_games, n_outcomes) probability of each outcome, per game
+        self.head_to_head = head_to_head        # (n_teams, n_teams) points earned by row team against column team so far
+        self.head_to_head_rule = head_to_head_rule
+        # standings points each outcome is worth to the home/away team, via the team class's own get_points
+        self.home_points = team_cls.from_store(StatsStore(stat_names, home_deltas.T)).get_points()
+        self.away_points = team_cls.from_store(StatsStore(stat_names, away_deltas.T)).get_points()
+
+    def n_teams(self) -> int:
+        return len(self.team_ids)
+
+    def n_games(self) -> int:
+        return len(self.home)
+
+
+def draw_outcomes(state: SimulationState, n_sims: int, rng: np.random.Generator) -> np.ndarray:
+    # inverse CDF over every game at once: offsetting game g's CDF by g makes the flattened table monotonic,
+    # so a single searchsorted finds the outcome of every (simulation, game) pair
+    n_games, n_outcomes = state.outcome_probs.shape
+    cdf = np.cumsum(state.outcome_probs, axis=1)
+    cdf[:, -1] = 1.0
+    offsets = np.arange(n_games)
+    flat_cdf = (cdf + offsets[:, None]).ravel()
+    u = rng.random((n_sims, n_games)) + offsets
+    outcomes = np.searchsorted(flat_cdf, u, side="right") - offsets*n_outcomes
+    return np.minimum(outcomes, n_outcomes - 1).astype(np.uint8)
+
+
+def simulated_stats(state: SimulationState, outcomes: np.ndarray) -> np.ndarray:
+    # count how often each team got each outcome in each simulation, then turn counts into stats: (n_stats, n_sims, n_teams)
+    n_sims = outcomes.shape[0]
+    n_teams, n_outcomes = state.n_teams(), len(state.outcome_labels)
+    sims = np.arange(n_sims)[:, None]
+    size = n_sims*n_teams*n_outcomes
+
+    home_counts = np.bincount(((sims*n_teams + state.home)*n_outcomes + outcomes).ravel(), minlength=size)
+    away_counts = np.bincount(((sims*n_teams + state.away)*n_outcomes + outcomes).ravel(), minlength=size)
+    home_counts = home_counts.reshape(n_sims, n_teams, n_outcomes)
+    away_counts = away_counts.reshape(n_sims, n_teams, n_outcomes)
+
+    totals = home_counts @ state.home_deltas + away_counts @ state.away_deltas
+    return np.moveaxis(totals, 2, 0) + state.stats[:, None, :]
+
+
+def head_to_head_among(state: SimulationState, outcomes: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    # points each team earned against teams sharing its label (official results plus the simulated games): (n_sims, n_teams).
+    # Raw points over every game, without the NHL's odd-game and percentage adjustments (see nhl_standings_rules)
+    n_sims, n_teams = labels.shape
+    sims = np.arange(n_sims)[:, None]*n_teams
+    same = np.take_along_axis(labels, np.broadcast_to(state.home, outcomes.shape), axis=1) == \
+           np.take_along_axis(labels, np.broadcast_to(state.away, outcomes.shape), axis=1)
+    size = n_sims*n_teams
+    h2h = np.bincount((sims + state.home).ravel(), weights=(state.home_points[outcomes]*same).ravel(), minlength=size)
+    h2h += np.bincount((sims + state.away).ravel(), weights=(state.away_points[outcomes]*same).ravel(), minlength=size)
+    official = (state.head_to_head*(labels[:, :, None] == labels[:, None, :])).sum(axis=2)
+    return h2h.reshape(n_sims, n_teams).astype(np.int32) + official
+
+
+def rank(state: SimulationState, stats: np.ndarray, flips: Optional[np.ndarray] = None, outcomes: Optional[np.ndarray] = None,
+         group: Optional[str] = None) -> np.ndarray:
+    # evaluate the season's standings rules on every simulation at once; returns team indices, best first: (n_sims, n_teams).
+    # With `group` (a playoff-rule group, eg "division"), head-to-head ties are broken among the tied teams of the same
+    # group only, as Season.rank does for one division or conference, so the order is right within each group (orders
+    # across groups can differ from the league-wide table).
+    team = state.team_cls.from_store(StatsStore(state.stat_names, stats))
+    rules = [np.asarray(k) for k in state.standings_rules(team)]
+
+    if state.head_to_head_rule is not None and outcomes is not None:
+        # label runs of teams level on every rule before the head-to-head one (and in the same group), then give each
+        # team the points it earned against the teams sharing its label
+        primary = rules[:state.head_to_head_rule]
+        if group is not None:
+            primary = [np.broadcast_to(state.groups[group], primary[0].shape)] + primary
+        order = np.lexsort([-k for k in reversed(primary)], axis=-1)
+        ranked = [np.take_along_axis(k, order, axis=-1) for k in primary]
+        new_group = np.any([k[:, 1:] != k[:, :-1] for k in ranked], axis=0)
+        labels_ranked = np.concatenate([np.zeros((order.shape[0], 1), dtype=np.intp), np.cumsum(new_group, axis=1)], axis=1)
+        labels = np.empty_like(labels_ranked)
+        np.put_along_axis(labels, order, labels_ranked, axis=1)
+        # only simulations that actually have a tie need head-to-head points
+        h2h = np.zeros(labels.shape, dtype=np.int32)
+        with_ties = ~new_group.all(axis=1)
+        h2h[with_ties] = head_to_head_among(state, outcomes[with_ties], labels[with_ties])
+        rules.insert(state.head_to_head_rule, h2h)
+
+    keys = [-k for k in reversed(rules)]
+    if flips is not None:
+        # anything still tied after every rule is settled by `flips` (a coin flip, one random key per team per
+        # simulation) rather than by team index
+        keys.insert(0, flips)
+    return np.lexsort(keys, axis=-1)
+
+
+def qualifiers(state: SimulationState, orders: dict[str, np.ndarray]) -> np.ndarray:
+    # apply playoff rules in stages (eg top 3 per division, then 2 wild cards per conference), each stage on the order
+    # ranked for its group (see playoff_qualifiers); returns (n_sims, n_teams) bools
+    qualified = np.zeros(next(iter(orders.values())).shape, dtype=bool)
+    for group, spots in state.playoff_rules:
+        order = orders[group]
+        codes = state.groups[group][order]
+        eligible = ~np.take_along_axis(qualified, order, axis=1)
+        in_group = (codes[..., None] == np.arange(codes.max() + 1)) & eligible[..., None]
+        position = np.take_along_axis(np.cumsum(in_group, axis=1), codes[..., None], axis=2)[..., 0]
+        chosen = np.empty_like(qualified)
+        np.put_along_axis(chosen, order, eligible & (position <= spots), axis=1)
+        qualified |= chosen
+    return qualified
+
+
+def playoff_qualifiers(state: SimulationState, stats: np.ndarray, rng: Optional[np.random.Generator] = None,
+                       outcomes: Optional[np.ndarray] = None) -> np.ndarray:
+    # rank once per playoff-rule group and apply the playoff rules; the coin flips (if rng is given) are drawn once and
+    # shared by every group's order
+    flips = None if rng is None else rng.random(stats.shape[1:])
+    orders = {group: rank(state, stats, flips, outcomes, group) for group in dict.fromkeys(g for g, _ in state.playoff_rules)}
+    return qualifiers(state, orders)
+
+
+def playoff_counts(state: SimulationState, n_sims: int, rng: np.random.Generator, batch_size: int = 5_000) -> np.ndarray:
+    # number of simulations in which each team makes the playoffs, run in batches to bound memory
+    counts = np.zeros(state.n_teams(), dtype=np.int64)
+    for start in range(0, n_sims, batch_size):
+        outcomes = draw_outcomes(state, min(batch_size, n_sims - start), rng)
+        counts += playoff_qualifiers(state, simulated_stats(state, outcomes), rng, outcomes).sum(axis=0)
+    return counts
+
+
+def outcome_playoff_counts(state: SimulationState, n_sims: int, rng: np.random.Generator,
+                           batch_size: int = 5_000) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # one pass of simulations, tallied per game outcome so playoff odds can be conditioned on any single result:
+    # playoff counts (n_teams,), simulations with each outcome (n_games, n_outcomes) and simulations with each outcome in
+    # which each team made the playoffs (n_games, n_outcomes, n_teams)
+    n_games, n_outcomes = state.outcome_probs.shape
+    counts = np.zeros(state.n_teams(), dtype=np.int64)
+    outcome_counts = np.zeros((n_games, n_outcomes), dtype=np.int64)
+    joint = np.zeros((n_games, n_outcomes, state.n_teams()), dtype=np.int64)
+    # simulations per indicator matrix below, so it stays around 4 MiB however long the schedule is
+    chunk = max(1, 2**20 // max(n_games, 1))
+    for start in range(0, n_sims, batch_size):
+        outcomes = draw_outcomes(state, min(batch_size, n_sims - start), rng)
+        qualified = playoff_qualifiers(state, simulated_stats(state, outcomes), rng, outcomes)
+        counts += qualified.sum(axis=0)
+        # (game, simulation) indicator of each outcome times (simulation, team) qualified conditions every team on every
+        # game's result in one matmul per outcome (float32 counts are exact up to 2**24 simulations per chunk)
+        for lo in range(0, len(outcomes), chunk):
+            drawn = outcomes[lo:lo + chunk]
+            made = qualified[lo:lo + chunk].astype(np.float32)
+            for o in range(n_outcomes):
+                hit = (drawn.T == o).astype(np.float32)
+                outcome_counts[:, o] += hit.sum(axis=1).astype(np.int64)
+                joint[:, o] += (hit @ made).astype(np.int64)
+    return counts, outcome_counts, joint
+
+
+# One batch of simulations kept around for what-if scenarios: the drawn outcomes and the stats they led to, both read-only
+# so any number of scenarios can share them. A scenario only rewrites the games it pins, then re-ranks.
+class SimulationBatch:
+    def __init__(self, state: SimulationState, outcomes: np.ndarray, stats: np.ndarray, seed: Optional[int],
+                 flip_seed: np.random.SeedSequence) -> None:
+        self.state = state
+        self.outcomes = outcomes                # (n_sims, n_games)
+        self.stats = stats                      # (n_stats, n_sims, n_teams)
+        self.seed = seed
+        self.flip_seed = flip_seed
+        self.outcomes.flags.writeable = False
+        self.stats.flags.writeable = False
+        self.game_index = {id: g for g, id in enumerate(state.game_ids)}
+        self.odds = self.playoff_odds(self.outcomes, self.stats)
+
+    def n_sims(self) -> int:
+        return self.outcomes.shape[0]
+
+    def playoff_odds(self, outcomes: np.ndarray, stats: np.ndarray) -> np.ndarray:
+        # same coin flips for every scenario, so pinning a game only moves odds through the games themselves
+        return playoff_qualifiers(self.state, stats, np.random.default_rng(self.flip_seed), outcomes).mean(axis=0)
+
+    # outcomes and stats with the given games (positions) forced to the given outcomes in every simulation
+    def pin(self, games: np.ndarray, pinned: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        outcomes = self.outcomes.copy()
+        stats = self.stats.copy()
+        state = self.state
+        for g, o in zip(games, pinned):
+            drawn = outcomes[:, g]
+            stats[:, :, state.home[g]] += state.home_deltas[o][:, None] - state.home_deltas[drawn].T
+            stats[:, :, state.away[g]] += state.away_deltas[o][:, None] - state.away_deltas[drawn].T
+            outcomes[:, g] = o
+        return outcomes, stats
+
+
+def simulation_batch(state: SimulationState, n_sims: int, seed: Optional[int] = None) -> SimulationBatch:
+    draw_seed, flip_seed = np.random.SeedSequence(seed).spawn(2)
+    outcomes = draw_outcomes(state, n_sims, np.random.default_rng(draw_seed))
+    return SimulationBatch(state, outcomes, simulated_stats(state, outcomes).astype(np.int32), seed, flip_seed)
@@ -0,0 +1,53 @@
+from collections.abc import Iterator, Mapping
+from types import EllipsisType
+from typing import Optional
+import numpy as np
+
+# Season-level columnar stats: one row per stat, one column per team (dense team index), so standings, simulations and
+# snapshots work on one contiguous block and copying a season's state is a single array copy.
+class StatsStore:
+    def __init__(self, stat_names: list[str], data: Optional[np.ndarray] = None) -> None:
+        self.stat_names = stat_names
+        self.stat_index = {name: i for i, name in enumerate(stat_names)}
+        self.data = np.zeros((len(stat_names), 0), dtype=np.int32) if data is None else data
+
+    def add_team(self) -> int:
+        self.data = np.concatenate([self.data, np.zeros((len(self.stat_names), 1), dtype=self.data.dtype)], axis=1)
+        return self.data.shape[1] - 1
+
+    def column(self, name: str) -> np.ndarray:
+        return self.data[self.stat_index[name]]
+
+    def reset(self) -> None:
+        self.data[...] = 0
+
+    def copy(self) -> "StatsStore":
+        return StatsStore(self.stat_names, self.data.copy())
+
+
+# dict-like window onto one team's column of a StatsStore. With index=Ellipsis it spans every team (and every simulation
+# if the store holds a batch), so the same getters/standings rules evaluate in bulk.
+class StatsView(Mapping):
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store: StatsStore, index: int | EllipsisType) -> None:
+        self.store = store
+        self.index = index
+
+    def __getitem__(self, name: str) -> int | np.ndarray:
+        if self.index is Ellipsis:
+            return self.store.data[self.store.stat_index[name]]
+        return self.store.data.item(self.store.stat_index[name], self.index)
+
+    def __setitem__(self, name: str, value: int | np.ndarray) -> None:
+        self.store.data[self.store.stat_index[name], self.index] = value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.store.stat_names)
+
+    def __len__(self) -> int:
+        return len(self.store.stat_names)
+
+    # one team's stats as a plain dict, read from the store in a single pass
+    def as_dict(self) -> dict[str, int]:
+        return dict(zip(self.store.stat_names, self.store.data[:, self.index].tolist()))
@@ -1,16 +1,46 @@
+from classes.stats import StatsStore, StatsView
+from types import EllipsisType
 from typing import Literal, Optional
 
+# Teams are thin views: names live on the object, stats live in a (usually season-wide) StatsStore column
 class Team:
-    def __init__(self, name: str, short_name: str, conference: str, team_name: Optional[str] = None, division: Optional[str] = None) -> None:
+    __slots__ = ('name', 'short_name', 'team_name', 'conference', 'division', 'stats')
+    stat_names: list[str] = ['wins', 'losses']
+
+    def __init__(self, name: str, short_name: str, conference: str, team_name: Optional[str] = None, division: Optional[str] = None,
+                 store: Optional[StatsStore] = None) -> None:
         self.name = name
         self.short_name = short_name
         self.team_name = team_name
         self.conference = conference
         self.division = division
-        self.stats: dict[str, int] = {
-            'wins': 0,
-            'losses': 0
-        }
+        store = StatsStore(self.stat_names) if store is None else store
+        self.stats = StatsView(store, store.add_team())
+
+    # bare team over a store's stats only (eg a batch of simulated stats with index=...), so getters and standings rules
+    # can be evaluated in bulk
+    @classmethod
+    def from_store(cls, store: StatsStore, index: int | EllipsisType = ...) -> "Team":
+        team = cls.__new__(cls)
+        team.stats = StatsView(store, index)
+        return team
+
+    # same team, with its stats read from another store with the same layout (eg a copy of the season's store)
+    def with_store(self, store: StatsStore) -> "Team":
+        team = self.__class__.__new__(self.__class__)
+        for slot in Team.__slots__:
+            setattr(team, slot, getattr(self, slot))
+        team.stats = StatsView(store, self.stats.index)
+        return team
+
+    # same team over a plain dict copy of its current stats, for work that reads many stats of one team (standings lines,
+    # sort keys, full recomputes); getters then cost a dict lookup instead of a store read each
+    def snapshot(self) -> "Team":
+        team = self.__class__.__new__(self.__class__)
+        for slot in Team.__slots__:
+            setattr(team, slot, getattr(self, slot))
+        team.stats = self.stats.as_dict()
+        return team
 
     def get_division(self) -> str:
         return self.division
@@ -18,33 +48,37 @@ class Team:
     def get_conference(self) -> str:
         return self.conference
 
-    def update_stats(self, home_score: int, away_score: int) -> None:
+    def update_stats(self, home_score: int, away_score: int, sign: int = 1) -> None:
         if home_score > away_score:
-            self.stats['wins'] += 1
+            self.stats['wins'] += sign
         else:
-            self.stats['losses'] += 1
+            self.stats['losses'] += sign
 
     def reset_stats(self) -> None:
-        self.stats = {stat: 0 for stat in self.stats.keys()}
+        for stat in self.stats.keys():
+            self.stats[stat] = 0
 
     def standings_line(self) -> list[int | float | str]:
         # TODO
         pass
 
 class NHLTeam(Team):
+    __slots__ = ()
+    stat_names: list[str] = Team.stat_names + [
+        'regulation_wins',
+        'regulation_losses',
+        'overtime_wins',
+        'shootout_wins',
+        'overtime_losses',
+        'shootout_losses',
+        'overall_goals_for',
+        'overall_goals_against'
+    ]
+
     def __init__(self, full_name: str, short_name: str, team_name: str, conference: Literal['Western', 'Eastern'],
-                 division: Literal['Central', 'Pacific', 'Metropolitan', 'Atlantic']) -> None:
-        super().__init__(name=full_name, short_name=short_name, conference=conference, team_name=team_name, division=division)
-        self.stats |= {
-            'regulation_wins': 0,
-            'regulation_losses': 0,
-            'overtime_wins': 0,
-            'shootout_wins': 0,
-            'overtime_losses': 0,
-            'shootout_losses': 0,
-            'overall_goals_for': 0,
-            'overall_goals_against': 0
-        }
+                 division: Literal['Central', 'Pacific', 'Metropolitan', 'Atlantic'], store: Optional[StatsStore] = None) -> None:
+        super().__init__(name=full_name, short_name=short_name, conference=conference, team_name=team_name, division=division,
+                         store=store)
     
     def get_overtime_shootout_loss_count(self) -> int:
         return self.stats['overtime_losses'] + self.stats['shootout_losses']
@@ -76,23 +110,23 @@ class NHLTeam(Team):
     def get_points_percentage(self) -> float:
         return (self.get_points() / self.get_games_played()) / 2 if self.get_games_played() > 0 else 0
     
-    def update_stats(self, goals_for:int, goals_against:int, result_type:Literal["R", "OT", "SO"]) -> None:
+    def update_stats(self, goals_for:int, goals_against:int, result_type:Literal["R", "OT", "SO"], sign: int = 1) -> None:
         if goals_for > goals_against:
             if result_type == "R":
-                self.stats['regulation_wins'] += 1
+                self.stats['regulation_wins'] += sign
             elif result_type == "OT":
-                self.stats['overtime_wins'] += 1
+                self.stats['overtime_wins'] += sign
             else:
-                self.stats['shootout_wins'] += 1
+                self.stats['shootout_wins'] += sign
         else:
             if result_type == "R":
-                self.stats['regulation_losses'] += 1
+                self.stats['regulation_losses'] += sign
             elif result_type == "OT":
-                self.stats['overtime_losses'] += 1
+                self.stats['overtime_losses'] += sign
             else:
-                self.stats['shootout_losses'] += 1
-        self.stats['overall_goals_for'] += goals_for
-        self.stats['overall_goals_against'] += goals_against
+                self.stats['shootout_losses'] += sign
+        self.stats['overall_goals_for'] += sign*goals_for
+        self.stats['overall_goals_against'] += sign*goals_against
     
     def standings_line(self) -> list[int | float | str]:
         diff = self.get_overall_goal_differential() if self.get_overall_goal_differential() < 1 else f"+{self.get_overall_goal_differential()}"
@@ -103,16 +137,18 @@ class NHLTeam(Team):
 
     
 class MLSTeam(Team):
-    def __init__(self, name: str, short_name: str, conference: Literal['Western', 'Eastern']) -> None:
-        super().__init__(name=name, short_name=short_name, conference=conference)
-        self.stats |= {
-            'ties': 0,
-            'home_goals_for': 0,
-            'home_goals_against': 0,
-            'away_goals_for': 0,
-            'away_goals_against': 0,
-            'disciplinary_points': 0
-        }
+    __slots__ = ()
+    stat_names: list[str] = Team.stat_names + [
+        'ties',
+        'home_goals_for',
+        'home_goals_against',
+        'away_goals_for',
+        'away_goals_against',
+        'disciplinary_points'
+    ]
+
+    def __init__(self, name: str, short_name: str, conference: Literal['Western', 'Eastern'], store: Optional[StatsStore] = None) -> None:
+        super().__init__(name=name, short_name=short_name, conference=conference, store=store)
     
     def get_win_count(self) -> int:
         return self.stats['wins']
@@ -150,22 +186,22 @@ class MLSTeam(Team):
     def get_disciplinary_points(self) -> int:
         return self.stats['disciplinary_points']
 
-    def update_stats(self, goals_for:int, goals_against:int, home:bool, disciplinary_points:int) -> None:
+    def update_stats(self, goals_for:int, goals_against:int, home:bool, disciplinary_points:int, sign: int = 1) -> None:
         if home:
-            self.stats['home_goals_for'] += goals_for
-            self.stats['home_goals_against'] += goals_against
+            self.stats['home_goals_for'] += sign*goals_for
+            self.stats['home_goals_against'] += sign*goals_against
         else:
-            self.stats['away_goals_for'] += goals_for
-            self.stats['away_goals_against'] += goals_against
+            self.stats['away_goals_for'] += sign*goals_for
+            self.stats['away_goals_against'] += sign*goals_against
         
         if goals_for > goals_against:
-            self.stats['wins'] += 1
+            self.stats['wins'] += sign
         elif goals_for == goals_against:
-            self.stats['ties'] += 1
+            self.stats['ties'] += sign
         else:
-            self.stats['losses'] += 1
+            self.stats['losses'] += sign
 
-        self.stats['disciplinary_points'] += disciplinary_points
+        self.stats['disciplinary_points'] += sign*disciplinary_points
     
     def standings_line(self) -> list[int | float | str]:
         diff = self.get_disciplinary_points() if self.get_disciplinary_points() < 1 else f"+{self.get_disciplinary_points()}"
@@ -0,0 +1,107 @@
+from classes.game import Game
+from classes.game_index import start_key
+from classes.season import Season
+from utils.snapshot import save_snapshot, load_snapshot
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+import numpy as np
+import os
+
+# Append-only log of game changes (one fixed-width record per Game.update/Season.add_game change) plus periodic snapshot
+# checkpoints, all in one directory. Any past state ("standings as of Feb 1") is rebuilt by loading the nearest earlier
+# checkpoint and replaying the events after it, without going back to the upstream API. Records hold a game's full
+# status/score state rather than a diff, so replaying an event twice is harmless.
+
+event_record = np.dtype([
+    ("timestamp", "<f8"),                       # seconds since the epoch, UTC
+    ("game_id", "<i8"),
+    ("status", "S16"),
+    ("home_score", "<i2"),
+    ("away_score", "<i2"),
+    ("result_type", "S4"),                      # empty if the league has none
+    ("home_disciplinary_points", "<i2"),
+    ("away_disciplinary_points", "<i2")
+])
+
+class GameEventLog:
+    def __init__(self, directory: str, checkpoint_every: int = 1000,
+                 now: Callable[[], datetime] = lambda: datetime.now(timezone.utc)) -> None:
+        self.directory = directory
+        self.checkpoint_every = checkpoint_every
+        self.now = now
+        self.events_path = os.path.join(directory, "events.bin")
+        self.season: Optional[Season] = None
+        self._schedule_changed = False
+        os.makedirs(directory, exist_ok=True)
+
+    # start logging a season's changes; the season's current state becomes a checkpoint to replay from. Load the schedule
+    # before attaching: every new game after that forces a checkpoint.
+    def attach(self, season: Season) -> None:
+        self.season = season
+        season.game_listeners.append(self.record)
+        self.checkpoint()
+
+    def detach(self) -> None:
+        self.season.game_listeners.remove(self.record)
+        self.season = None
+
+    def event_count(self) -> int:
+        return os.path.getsize(self.events_path)//event_record.itemsize if os.path.exists(self.events_path) else 0
+
+    def record(self, game_id: int, game: Game, changed: dict[str, Any]) -> None:
+        event = np.array([(self.now().timestamp(), game_id, game.status.encode(), game.home_score, game.away_score,
+                           (getattr(game, 'result_type', None) or "").encode(), getattr(game, 'home_disciplinary_points', 0),
+                           getattr(game, 'away_disciplinary_points', 0))], dtype=event_record)
+        with open(self.events_path, "ab") as f:
+            f.write(event.tobytes())
+
+        # events only carry status/scores, so a new (or re-paired/rescheduled) game has to reach a checkpoint
+        # before its events can be replayed
+        if changed.keys() & {"home_id", "away_id", "start"}:
+            self._schedule_changed = True
+        if self._schedule_changed or self.event_count() % self.checkpoint_every == 0:
+            self.checkpoint()
+
+    def checkpoint(self) -> str:
+        path = os.path.join(self.directory, f"checkpoint-{self.event_count():012d}-{int(self.now().timestamp()*1e6):020d}.snap")
+        save_snapshot(self.season, path)
+        self._schedule_changed = False
+        return path
+
+    # (event count, timestamp, path) of every checkpoint, oldest first
+    def checkpoints(self) -> list[tuple[int, float, str]]:
+        found = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.startswith("checkpoint-") and name.endswith(".snap"):
+                count, micros = name[len("checkpoint-"):-len(".snap")].split("-")
+                found.append((int(count), int(micros)/1e6, os.path.join(self.directory, name)))
+        return found
+
+    def events(self) -> np.ndarray:
+        if not self.event_count():
+            return np.zeros(0, dtype=event_record)
+        return np.memmap(self.events_path, dtype=event_record, mode="r")
+
+    # the season as it stood at `moment`, rebuilt from the nearest earlier checkpoint
+    def season_at(self, moment: datetime) -> Season:
+        timestamp = start_key(moment)
+        earlier = [c for c in self.checkpoints() if c[1] <= timestamp]
+        if not earlier:
+            raise ValueError(f"no checkpoint at or before {moment.isoformat()}")
+        count, _, path = earlier[-1]
+        season = load_snapshot(path)
+
+        events = self.events()[count:]
+        for event in events[events["timestamp"] <= timestamp]:
+            game = season.games[int(event["game_id"])]
+            fields = {"status": event["status"].decode(), "home_score": int(event["home_score"]), "away_score": int(event["away_score"])}
+            if hasattr(game, 'result_type'):
+                fields["result_type"] = event["result_type"].decode() or None
+            if hasattr(game, 'home_disciplinary_points'):
+                fields["home_disciplinary_points"] = int(event["home_disciplinary_points"])
+                fields["away_disciplinary_points"] = int(event["away_disciplinary_points"])
+            game.update_fields(**fields)
+        return season
+
+    def standings_at(self, moment: datetime, *args: Any, **kwargs: Any) -> list[list[int | float | str]]:
+        return self.season_at(moment).standings(*args, **kwargs)
@@ -0,0 +1,114 @@
+from aiohttp import web
+from classes.season import NHLSeason
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from utils.live_poller import LivePoller
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Replays recorded live feeds to a LivePoller through a local HTTP server, so following games can be checked end to end
+# without the real feed. Run from the repo root:
+#   python -m utils.feed_replay                                    # replay utils/recordings/nhl_live_feed.json
+#   python -m utils.feed_replay path/to/recording.json
+# A recording holds the season's teams and, per game, when it starts (seconds after the replay starts, negative for a game
+# already under way), the feed responses in the order they are served (the last one repeats) and the fields the game has
+# to end with. Intermission times in a recording are cut down to fractions of a second so a replay takes seconds. The
+# check fails (exit status 1) if a game ends with other fields, a response is never served, a poll comes sooner than an
+# intermission's time remaining, the poller doesn't finish within --timeout or the standings don't match a full recompute.
+
+default_recording = os.path.join(os.path.dirname(__file__), "recordings", "nhl_live_feed.json")
+
+# fast enough for a replay, otherwise the poller's own logic
+poller_settings: dict[str, Any] = {"max_requests_per_second": 50.0, "live_interval": 0.05, "pregame_interval": 0.05,
+                                   "idle_interval": 1.0, "lead_time": timedelta(seconds=0.1)}
+
+# Serves NHLSeason.live_game_request (schedule?gamePk=...) from the recorded responses, one per request per game
+class FeedServer:
+    def __init__(self, feeds: dict[int, list[dict[str, Any]]], host: str = "127.0.0.1", port: int = 0) -> None:
+        self.feeds = feeds
+        self.host = host
+        self.port = port                                # 0 for any free port
+        self.requests: dict[int, list[float]] = {id: [] for id in feeds}  # time.monotonic() of each request, per game
+        self._runner: Optional[web.AppRunner] = None
+
+    # starts serving and returns the schedule URL
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/schedule", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}/schedule"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        game_id = int(request.query.get("gamePk", 0))
+        if game_id not in self.feeds:
+            raise web.HTTPNotFound()
+        served = self.requests[game_id]
+        served.append(time.monotonic())
+        frames = self.feeds[game_id]
+        return web.json_response(frames[min(len(served), len(frames)) - 1])
+
+
+# replays one recording; returns what went wrong, nothing if the poller followed every game to its recorded result
+async def replay(recording: dict[str, Any], timeout: float = 30.0) -> list[str]:
+    games = {int(id): game for id, game in recording["games"].items()}
+    server = FeedServer({id: game["feed"] for id, game in games.items()})
+    url = await server.start()
+    problems = []
+    try:
+        season = NHLSeason(recording["season"], import_json={"teams": recording["teams"], "games": {}})
+        season.schedule_url = url
+        now = datetime.now(timezone.utc)
+        for id, game in games.items():
+            season.add_game(id, game["home_id"], game["away_id"], now + timedelta(seconds=game["starts_in"]), "Scheduled")
+
+        try:
+            await asyncio.wait_for(LivePoller(season, **poller_settings).run(), timeout)
+        except asyncio.TimeoutError:
+            problems.append(f"poller still running after {timeout}s")
+
+        for id, game in games.items():
+            fields = season.games[id].fields()
+            ended = {field: fields[field] for field in game["final"]}
+            if ended != game["final"]:
+                problems.append(f"game {id}: ended {ended}, recorded {game['final']}")
+            served = server.requests[id]
+            if len(served) < len(game["feed"]):
+                problems.append(f"game {id}: served {len(served)} of {len(game['feed'])} responses")
+            for i, (frame, polled) in enumerate(zip(game["feed"], served)):
+                _, intermission = season.parse_live_game(frame)
+                if intermission is not None and i + 1 < len(served) and served[i + 1] - polled < intermission:
+                    problems.append(f"game {id}: polled {served[i + 1] - polled:.2f}s into a {intermission}s intermission")
+        if not season.validate_standings():
+            problems.append("standings don't match a full recompute")
+    finally:
+        await server.stop()
+    return problems
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded live feeds to the live poller and check the results")
+    parser.add_argument("recording", nargs="?", default=default_recording, help="recording file (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds the poller gets to follow every game")
+    args = parser.parse_args(argv)
+
+    with open(args.recording) as f:
+        recording = json.load(f)
+    problems = asyncio.run(replay(recording, args.timeout))
+    for problem in problems:
+        print(problem)
+    print(f"{len(recording['games'])} games replayed, {len(problems)} problem(s)")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
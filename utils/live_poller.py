@@ -0,0 +1,126 @@
+from classes.game_index import start_key
+from classes.season import Season
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+import aiohttp
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Follows a season's games as they happen (readme, "Tracking games"): shortly before each game's start a worker task starts
+# polling that game until it is final, applying changes through Game.update (which only touches fields that changed).
+# All requests share one pooled HTTP session and one global request budget, so polling slows down as more games are live;
+# workers also back off in intermissions, and between game days the scheduler sleeps until the next game is due.
+# The feed itself comes from the season (Season.live_game_request/parse_live_game), so pointing eg
+# NHLSeason.schedule_url at a local server replays recorded feeds (utils/feed_replay.py).
+class LivePoller:
+    def __init__(self, season: Season, session: Optional[aiohttp.ClientSession] = None, max_requests_per_second: float = 2.0,
+                 max_connections: int = 8, live_interval: float = 15.0, pregame_interval: float = 120.0,
+                 idle_interval: float = 3600.0, lead_time: timedelta = timedelta(minutes=15),
+                 give_up_after: timedelta = timedelta(hours=8), now: Callable[[], datetime] = lambda: datetime.now(timezone.utc)) -> None:
+        self.season = season
+        self.session = session
+        self.max_requests_per_second = max_requests_per_second
+        self.max_connections = max_connections
+        self.live_interval = live_interval              # seconds between polls of a game in progress
+        self.pregame_interval = pregame_interval        # seconds between polls of a game that hasn't started yet
+        self.idle_interval = idle_interval              # longest the scheduler sleeps, so schedule changes get picked up
+        self.lead_time = lead_time                      # how long before its start a game gets a worker
+        self.give_up_after = give_up_after              # how long after its start a game that never went live is dropped (postponed)
+        self.now = now
+        self.workers: dict[int, asyncio.Task] = {}
+        self._next_request = 0.0
+        self._lock = asyncio.Lock()
+
+    async def run(self, stop_when_done: bool = True) -> None:
+        owns_session = self.session is None
+        if owns_session:
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.max_connections))
+        try:
+            while True:
+                now = self.now()
+                self.workers = {id: task for id, task in self.workers.items() if not task.done()}
+                for game_id in self.due_games(now):
+                    self.workers[game_id] = asyncio.create_task(self.follow(game_id))
+
+                next_start = self.next_start(now)
+                if next_start is None and not self.workers and stop_when_done:
+                    return
+                # off-days: sleep until the next game is due (or a worker finishes), checking back at least every idle_interval
+                wait = self.idle_interval if next_start is None else (next_start - self.lead_time - now).total_seconds()
+                wait = min(max(wait, 0.0), self.idle_interval)
+                if self.workers:
+                    await asyncio.wait(self.workers.values(), timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                else:
+                    await asyncio.sleep(wait)
+        finally:
+            for task in self.workers.values():
+                task.cancel()
+            await asyncio.gather(*self.workers.values(), return_exceptions=True)
+            if owns_session:
+                await self.session.close()
+                self.session = None
+
+    def _pending(self, game_id: int, now: datetime) -> bool:
+        game = self.season.games[game_id]
+        return (game.status != self.season.final_status and
+                (game.status == self.season.live_status or start_key(now) <= start_key(game.start) + self.give_up_after.total_seconds()))
+
+    # candidates come from the season's game index: games in progress plus games starting between give_up_after ago and
+    # lead_time from now, rather than a scan of the whole schedule
+    def due_games(self, now: datetime) -> list[int]:
+        index = self.season.game_index
+        candidates = dict.fromkeys([*index.with_status(self.season.live_status),
+                                    *index.between(now - self.give_up_after, now + self.lead_time)])
+        return [id for id in candidates
+                if id not in self.workers and self._pending(id, now) and start_key(self.season.games[id].start) - self.lead_time.total_seconds() <= start_key(now)]
+
+    def next_start(self, now: datetime) -> Optional[datetime]:
+        for id in self.season.game_index.after(now + self.lead_time):
+            if id not in self.workers and self._pending(id, now):
+                return datetime.fromtimestamp(start_key(self.season.games[id].start), timezone.utc)
+        return None
+
+    async def follow(self, game_id: int) -> None:
+        game = self.season.games[game_id]
+        while self._pending(game_id, self.now()):
+            intermission = None
+            try:
+                fields, intermission = await self.fetch(game_id)
+                changed = game.update(**fields)
+                if changed:
+                    logger.debug("game %s: %s", game_id, changed)
+            except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, IndexError) as error:
+                logger.warning("game %s: poll failed (%r)", game_id, error)
+            if game.status == self.season.final_status:
+                return
+            await asyncio.sleep(self.interval(game, intermission))
+
+    # seconds until a game is polled again: slower before puck drop and in intermissions, and never faster than the
+    # shared request budget allows for every game currently being followed
+    def interval(self, game: Any, intermission: Optional[float]) -> float:
+        if intermission is not None:
+            base = max(self.live_interval, intermission)
+        elif game.status == self.season.live_status:
+            base = self.live_interval
+        else:
+            base = self.pregame_interval
+        return max(base, len(self.workers)/self.max_requests_per_second)
+
+    async def fetch(self, game_id: int) -> tuple[dict[str, Any], Optional[float]]:
+        url, params = self.season.live_game_request(game_id)
+        await self._throttle()
+        async with self.session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=30)) as response:
+            response.raise_for_status()
+            payload = await response.json()
+        return self.season.parse_live_game(payload)
+
+    async def _throttle(self) -> None:
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            wait = self._next_request - now
+            self._next_request = max(now, self._next_request) + 1/self.max_requests_per_second
+        if wait > 0:
+            await asyncio.sleep(wait)
@@ -0,0 +1,55 @@
+from collections import deque
+
+# Dinic's algorithm on a small integer-capacity graph; nodes are 0..n_nodes-1
+class FlowNetwork:
+    def __init__(self, n_nodes: int) -> None:
+        self.n_nodes = n_nodes
+        self.edges: list[list[int]] = []                      # [to, remaining capacity], edge i^1 is the reverse of edge i
+        self.adjacency: list[list[int]] = [[] for _ in range(n_nodes)]
+
+    def add_edge(self, u: int, v: int, capacity: int) -> None:
+        self.adjacency[u].append(len(self.edges))
+        self.edges.append([v, capacity])
+        self.adjacency[v].append(len(self.edges))
+        self.edges.append([u, 0])
+
+    def max_flow(self, source: int, sink: int) -> int:
+        flow = 0
+        while True:
+            level = self._levels(source)
+            if level[sink] < 0:
+                return flow
+            next_edge = [0]*self.n_nodes
+            pushed = self._push(source, sink, float('inf'), level, next_edge)
+            while pushed:
+                flow += pushed
+                pushed = self._push(source, sink, float('inf'), level, next_edge)
+
+    def _levels(self, source: int) -> list[int]:
+        level = [-1]*self.n_nodes
+        level[source] = 0
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            for e in self.adjacency[u]:
+                v, capacity = self.edges[e]
+                if capacity > 0 and level[v] < 0:
+                    level[v] = level[u] + 1
+                    queue.append(v)
+        return level
+
+    def _push(self, u: int, sink: int, limit: float, level: list[int], next_edge: list[int]) -> int:
+        if u == sink:
+            return limit
+        adjacency = self.adjacency[u]
+        while next_edge[u] < len(adjacency):
+            e = adjacency[next_edge[u]]
+            v, capacity = self.edges[e]
+            if capacity > 0 and level[v] == level[u] + 1:
+                pushed = self._push(v, sink, min(limit, capacity), level, next_edge)
+                if pushed:
+                    self.edges[e][1] -= pushed
+                    self.edges[e ^ 1][1] += pushed
+                    return pushed
+            next_edge[u] += 1
+        return 0
@@ -1,6 +1,11 @@
+from collections.abc import Mapping
 from datetime import datetime
 
 def serializer(obj):
     if isinstance(obj, datetime):
         return obj.isoformat()
-    return obj.__dict__
\ No newline at end of file
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if not hasattr(obj, '__dict__'):
+        return {slot: getattr(obj, slot) for cls in type(obj).__mro__ for slot in getattr(cls, '__slots__', ())}
+    return {key: value for key, value in obj.__dict__.items() if not key.startswith('_')}
\ No newline at end of file
@@ -0,0 +1,92 @@
+from classes.season import Season
+from classes.simulation import SimulationState, playoff_counts
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Hashable, Optional
+import numpy as np
+
+# Runs playoff-odds simulations for many seasons (leagues, years, what-if scenarios) on a process pool. Each season's
+# SimulationState arrays are copied once into a shared memory block that workers map read-only, so a task only pickles
+# the block's name and layout, never the season's teams or games. Every job is cut into fixed-size shards, each with its
+# own child of the job's SeedSequence, so the odds depend only on (seed, n_sims, shard_size), not on how many processes
+# ran them or in what order; shard counts are summed at the end.
+
+_array_fields = ("stats", "home", "away", "home_deltas", "away_deltas", "outcome_probs", "head_to_head")
+
+class SharedState:
+    def __init__(self, state: SimulationState) -> None:
+        arrays = {field: np.ascontiguousarray(getattr(state, field)) for field in _array_fields}
+        arrays.update({f"group:{group}": np.ascontiguousarray(codes) for group, codes in state.groups.items()})
+        self.layout: list[tuple[str, str, tuple[int, ...], int]] = []
+        offset = 0
+        for name, array in arrays.items():
+            self.layout.append((name, array.dtype.str, array.shape, offset))
+            offset += -(-array.nbytes // 8)*8
+        self.memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (name, _, _, start), array in zip(self.layout, arrays.values()):
+            self.memory.buf[start:start + array.nbytes] = array.tobytes()
+        # everything else is small and picklable (module-level rule functions, the team class, labels)
+        self.meta = {"team_ids": state.team_ids, "game_ids": state.game_ids, "team_cls": state.team_cls,
+                     "standings_rules": state.standings_rules, "playoff_rules": state.playoff_rules, "stat_names": state.stat_names,
+                     "outcome_labels": state.outcome_labels, "head_to_head_rule": state.head_to_head_rule}
+
+    def spec(self) -> tuple[str, list[tuple[str, str, tuple[int, ...], int]], dict[str, Any]]:
+        return self.memory.name, self.layout, self.meta
+
+    def release(self) -> None:
+        self.memory.close()
+        self.memory.unlink()
+
+
+# per worker process: shared memory name -> (mapping, state), so each worker attaches to a season once
+_attached: dict[str, tuple[shared_memory.SharedMemory, SimulationState]] = {}
+
+def _attach(spec: tuple[str, list[tuple[str, str, tuple[int, ...], int]], dict[str, Any]]) -> SimulationState:
+    name, layout, meta = spec
+    if name not in _attached:
+        memory = shared_memory.SharedMemory(name=name)
+        arrays = {}
+        for field, dtype, shape, offset in layout:
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf, offset=offset)
+            array.flags.writeable = False
+            arrays[field] = array
+        groups = {field[len("group:"):]: array for field, array in arrays.items() if field.startswith("group:")}
+        state = SimulationState(meta["team_ids"], meta["game_ids"], meta["team_cls"], meta["standings_rules"],
+                                meta["playoff_rules"], meta["stat_names"], arrays["stats"], groups, arrays["home"], arrays["away"],
+                                meta["outcome_labels"], arrays["home_deltas"], arrays["away_deltas"],
+                                arrays["outcome_probs"], arrays["head_to_head"], meta["head_to_head_rule"])
+        _attached[name] = (memory, state)
+    return _attached[name][1]
+
+def _run_shard(spec: tuple[str, list[tuple[str, str, tuple[int, ...], int]], dict[str, Any]], n_sims: int,
+               seed: np.random.SeedSequence, batch_size: int) -> np.ndarray:
+    return playoff_counts(_attach(spec), n_sims, np.random.default_rng(seed), batch_size)
+
+
+class SimulationRunner:
+    def __init__(self, processes: Optional[int] = None, shard_size: int = 10_000, batch_size: int = 5_000) -> None:
+        self.processes = processes                  # pool size, None for one per core
+        self.shard_size = shard_size                # simulations per task; part of what the odds are reproducible for
+        self.batch_size = batch_size                # simulations per vectorized batch inside a task, bounds memory
+
+    # jobs: key -> (season, n_sims); returns key -> {team_id: playoff odds}. Job i is seeded with child i of `seed`,
+    # in the order the jobs are given.
+    def run(self, jobs: dict[Hashable, tuple[Season, int]], seed: Optional[int] = None) -> dict[Hashable, dict[int, float]]:
+        job_seeds = np.random.SeedSequence(seed).spawn(len(jobs))
+        shared = {key: SharedState(season.simulation_state()) for key, (season, _) in jobs.items()}
+        try:
+            with ProcessPoolExecutor(self.processes) as pool:
+                futures = {key: [] for key in jobs}
+                for (key, (_, n_sims)), job_seed in zip(jobs.items(), job_seeds):
+                    shard_sizes = [min(self.shard_size, n_sims - start) for start in range(0, n_sims, self.shard_size)]
+                    for size, shard_seed in zip(shard_sizes, job_seed.spawn(len(shard_sizes))):
+                        futures[key].append(pool.submit(_run_shard, shared[key].spec(), size, shard_seed, self.batch_size))
+
+                odds = {}
+                for key, (_, n_sims) in jobs.items():
+                    counts = sum((future.result() for future in futures[key]), np.zeros(len(shared[key].meta["team_ids"]), dtype=np.int64))
+                    odds[key] = {id: float(count/n_sims) for id, count in zip(shared[key].meta["team_ids"], counts)}
+                return odds
+        finally:
+            for block in shared.values():
+                block.release()
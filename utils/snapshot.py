@@ -0,0 +1,164 @@
+from classes.game import Game
+from classes.game_index import start_key
+from classes.season import Season, MLSSeason, NHLSeason
+from collections.abc import Iterator, MutableMapping
+from datetime import datetime, timezone
+from typing import Any, Optional
+import numpy as np
+import inspect
+import json
+import mmap
+
+# Binary season snapshots: an 8-byte magic, the header length, a JSON header (league, teams, code tables), then
+# fixed-width game records, the official stats store and the head-to-head matrix as raw arrays. Loading memory-maps the
+# file and restores the standings arrays directly, so nothing is replayed; Game objects are only built when looked up.
+
+MAGIC = b"AWSNAP01"
+ALIGN = 8
+
+game_record = np.dtype([
+    ("game_id", "<i8"),
+    ("home_id", "<i8"),
+    ("away_id", "<i8"),
+    ("start", "<i8"),                           # seconds since the epoch, UTC
+    ("status", "u1"),                           # index into header["statuses"]
+    ("result_type", "u1"),                      # index into header["result_types"]
+    ("home_score", "<i2"),
+    ("away_score", "<i2"),
+    ("home_disciplinary_points", "<i2"),
+    ("away_disciplinary_points", "<i2")
+])
+
+leagues: dict[str, type] = {"NHLSeason": NHLSeason, "MLSSeason": MLSSeason}
+
+def _padded(length: int) -> int:
+    return -(-length // ALIGN)*ALIGN
+
+def game_records(season: Season, statuses: list[str], result_types: list[Optional[str]]) -> np.ndarray:
+    records = np.zeros(len(season.games), dtype=game_record)
+    status_codes = {status: i for i, status in enumerate(statuses)}
+    result_codes = {result_type: i for i, result_type in enumerate(result_types)}
+    for i, (id, game) in enumerate(season.games.items()):
+        records[i] = (id, game.home_id, game.away_id, int(start_key(game.start)), status_codes[game.status],
+                      result_codes[getattr(game, 'result_type', None)], game.home_score, game.away_score,
+                      getattr(game, 'home_disciplinary_points', 0), getattr(game, 'away_disciplinary_points', 0))
+    return records
+
+def save_snapshot(season: Season, path: str) -> None:
+    games = list(season.games.values())
+    statuses = sorted({game.status for game in games})
+    result_types = [None] + sorted({game.result_type for game in games if getattr(game, 'result_type', None) is not None})
+    records = game_records(season, statuses, result_types)
+    teams = sorted(season.teams.items(), key=lambda item: item[1].stats.index)
+    stats = season.stats_store.data[:, [team.stats.index for _, team in teams]].astype("<i4")
+    head_to_head = season.head_to_head[np.ix_(*[[team.stats.index for _, team in teams]]*2)].astype("<i4")
+
+    header = {
+        "league": type(season).__name__,
+        "start_year": season.start_year,
+        "teams": [{"id": id, "name": team.name, "short_name": team.short_name, "team_name": team.team_name,
+                   "conference": team.conference, "division": team.division} for id, team in teams],
+        "statuses": statuses,
+        "result_types": result_types,
+        "aware": any(game.start.tzinfo is not None for game in games),
+        "n_games": len(records),
+        "stat_names": season.stats_store.stat_names
+    }
+    encoded = json.dumps(header).encode()
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(encoded)).tobytes())
+        f.write(encoded.ljust(_padded(len(encoded)), b" "))
+        for array in (records, stats, head_to_head):
+            f.write(array.tobytes())
+
+def load_snapshot(path: str) -> Season:
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a season snapshot")
+    header_length = int(np.frombuffer(buffer, dtype="<u8", count=1, offset=len(MAGIC))[0])
+    offset = len(MAGIC) + 8
+    header = json.loads(bytes(buffer[offset:offset + header_length]))
+    offset += _padded(header_length)
+
+    n_teams, n_stats = len(header["teams"]), len(header["stat_names"])
+    records = np.frombuffer(buffer, dtype=game_record, count=header["n_games"], offset=offset)
+    offset += records.nbytes
+    stats = np.frombuffer(buffer, dtype="<i4", count=n_stats*n_teams, offset=offset).reshape(n_stats, n_teams)
+    offset += stats.nbytes
+    head_to_head = np.frombuffer(buffer, dtype="<i4", count=n_teams*n_teams, offset=offset).reshape(n_teams, n_teams)
+
+    season_cls = leagues[header["league"]]
+    if season_cls is NHLSeason:
+        season = NHLSeason(header["start_year"], import_json={"teams": {team["id"]: team for team in header["teams"]}, "games": {}})
+    else:
+        season = season_cls(header["start_year"])
+        for team in header["teams"]:
+            season.add_team(team["name"], team["short_name"], team["conference"], team["id"])
+
+    season.stats_store.data[...] = stats
+    season.head_to_head[...] = head_to_head
+    store_index = {id: team.stats.index for id, team in season.teams.items()}
+    home = np.array([store_index[id] for id in records["home_id"].tolist()], dtype=np.intp)
+    away = np.array([store_index[id] for id in records["away_id"].tolist()], dtype=np.intp)
+    final = records["status"] == header["statuses"].index(season.final_status) if season.final_status in header["statuses"] else np.zeros(len(records), dtype=bool)
+    for games, mask in ((season.played_games, final), (season.remaining_games, ~final)):
+        np.add.at(games, (home[mask], away[mask]), 1)
+        np.add.at(games, (away[mask], home[mask]), 1)
+    season.games = SnapshotGames(season, header, records)
+    season.game_index.extend(zip(records["game_id"].tolist(), records["home_id"].tolist(), records["away_id"].tolist(),
+                                 records["start"].astype(float).tolist(), [header["statuses"][code] for code in records["status"].tolist()]))
+    # the live overlay only needs the games in progress
+    for id in season.live_games():
+        season.record_live_game(season._live_delta_teams, season.games[id])
+    season._live_stale = True
+    return season
+
+
+# Season.games backed by a snapshot's memory-mapped game records; a Game is built (and attached to the season, so its
+# updates reach the standings) the first time it is looked up. New games are kept alongside.
+class SnapshotGames(MutableMapping):
+    def __init__(self, season: Season, header: dict[str, Any], records: np.ndarray) -> None:
+        self.season = season
+        self.header = header
+        self.records = records
+        self.positions = {int(id): i for i, id in enumerate(records["game_id"])}
+        self.games: dict[int, Game] = {}
+        parameters = inspect.signature(season.game_cls).parameters
+        self.extra_fields = [field for field in ("result_type", "home_disciplinary_points", "away_disciplinary_points") if field in parameters]
+
+    def __getitem__(self, game_id: int) -> Game:
+        game = self.games.get(game_id)
+        if game is None:
+            game = self.games[game_id] = self._build(self.records[self.positions[game_id]])
+        return game
+
+    def __setitem__(self, game_id: int, game: Game) -> None:
+        self.games[game_id] = game
+
+    def __delitem__(self, game_id: int) -> None:
+        if game_id not in self:
+            raise KeyError(game_id)
+        self.positions.pop(game_id, None)
+        self.games.pop(game_id, None)
+
+    def __contains__(self, game_id: object) -> bool:
+        return game_id in self.games or game_id in self.positions
+
+    def __iter__(self) -> Iterator[int]:
+        yield from self.positions
+        yield from (id for id in self.games if id not in self.positions)
+
+    def __len__(self) -> int:
+        return len(self.positions) + sum(id not in self.positions for id in self.games)
+
+    def _build(self, record: np.void) -> Game:
+        start = datetime.fromtimestamp(int(record["start"]), tz=timezone.utc)
+        extras = {field: self.header["result_types"][record[field]] if field == "result_type" else int(record[field])
+                  for field in self.extra_fields}
+        game = self.season.game_cls(int(record["home_id"]), int(record["away_id"]), start if self.header["aware"] else start.replace(tzinfo=None),
+                                    self.header["statuses"][record["status"]], int(record["home_score"]), int(record["away_score"]), **extras)
+        game._season = self.season
+        game._id = int(record["game_id"])
+        return game